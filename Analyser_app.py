@@ -1,119 +1,1084 @@
-import pandas as pd
 import re
-from datetime import datetime
-import matplotlib.pyplot as plt
-import seaborn as sns
-import base64
-from io import BytesIO
-import webbrowser
+import html
 import os
-from collections import Counter
+import argparse
+import csv
+import heapq
+import time
+from collections import Counter, OrderedDict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from array import array
+from pcap_reader import is_pcap_file, iter_pcap_records
+from sketches import ExactCounter, ExactDistinct, HyperLogLog, SpaceSaving
+from dates_calendrier import charger_numpy
+from charts import IMAGE_FORMATS, ChartCache, bar_chart, data_uri, default_cache_dir, relative_url
+from payload_scan import (DEFAULT_SIGNATURES, SignatureMatcher, load_signatures, signature_label,
+                          transport_payload)
 
-def analyze_tcpdump(file_path):
-    try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-        
-        protocols, ip_src, ip_dst, packets = [], [], [], []
-        tcp_flags = {'SYN': 0, 'PUSH-ACK': 0, 'SYN-ACK': 0, 'ACK': 0}
-        ip_pattern = r'IP (?:([0-9]+(?:\.[0-9]+){3})\.([0-9]+))? ?([0-9]+(?:\.[0-9]+){3})?'
-        packet_pattern = re.compile(r'(\d{2}:\d{2}:\d{2}\.\d{6})\s+IP\s+(.*?)\s+>\s+(.*?):\s+(.*)')
-        
-        for line in lines:
-            match = packet_pattern.match(line)
-            if match:
-                timestamp, src, dst, info = match.groups()
-                packets.append({'timestamp': timestamp, 'source': src, 'destination': dst, 'info': info})
-                
-                if 'Flags [S]' in info:
-                    tcp_flags['SYN'] += 1
-                elif 'Flags [P.]' in info:
-                    tcp_flags['PUSH-ACK'] += 1
-                elif 'Flags [S.]' in info:
-                    tcp_flags['SYN-ACK'] += 1
-                elif 'Flags [A]' in info:
-                    tcp_flags['ACK'] += 1
-            
-            if 'IP' in line:
-                parts = line.split('>')
-                if len(parts) > 1:
-                    proto = parts[1].strip().split(':')[0].strip().split('.')[-1]
-                    protocols.append(proto)
-                
-                ip_match = re.search(ip_pattern, line)
-                if ip_match:
-                    if ip_match.group(1):
-                        ip_src.append(ip_match.group(1))
-                    if ip_match.group(3):
-                        ip_dst.append(ip_match.group(3))
-
-        protocol_counts = Counter(protocols)
-        ip_counts = Counter(ip_src)
-        
-        stats = {
-            'network_stats': {
-                'packets_analyzed': len(packets),
-                'packets_rate': f"{len(packets)/60:.1f}/s",
-                'anomalies': {
-                    'count': sum(1 for p in packets if 'Flags [S]' in p['info']),
-                    'percentage': f"{sum(1 for p in packets if 'Flags [S]' in p['info'])/len(packets)*100:.1f}%"
-                },
-                'suspicious_ips': {
-                    'count': len(set(p['source'] for p in packets if 'Flags [S]' in p['info'])),
-                    'percentage': f"{len(set(p['source'] for p in packets if 'Flags [S]' in p['info']))/len(set(p['source'] for p in packets))*100:.1f}%"
-                },
-                'services': {
-                    'count': len(set(p['destination'].split('.')[-1] for p in packets if '.' in p['destination'])),
-                    'percentage': '-'
-                },
-                'tcp_flags': tcp_flags
+READ_BUFFER_SIZE = 1 << 20
+MIN_CHUNK_SIZE = 8 << 20
+DAY_US = 86_400 * 1_000_000
+DEFAULT_WINDOW = 1.0
+DEFAULT_BURST_RATE = 50.0
+DEFAULT_FLOW_TTL = 30.0
+DEFAULT_MAX_FLOWS = 100_000
+MAX_TRACKED_KEYS = 10_000
+HALF_OPEN_RATIO = 0.8
+MIN_SYN_FOR_ALERT = 10
+DEFAULT_TOP_K = 1000
+DEFAULT_FLOW_IDLE = 60.0
+DEFAULT_HLL_PRECISION = 14
+CONTINUATION_PREFIXES = ('\t', ' ')
+HEX_PREFIX = '\t0x'
+# Colonnes des 8 groupes de 4 chiffres hexadecimaux apres "\t0x0000:  "
+HEX_COLUMNS = slice(10, 49)
+MAX_SIGNATURE_ALERTS = 100
+MAX_BURST_ALERTS = 100
+PACKET_LINE = re.compile(
+    r'(\d\d:\d\d:\d\d\.\d{6}) IP (\S+) > ([^\s:]+): '
+    r'(?:Flags \[([^\]]*)\], )?'
+    r'(?:seq (\d+)(?::\d+)?, )?'
+    r'(?:ack (\d+), )?'
+    r'(?:win (\d+), )?'
+    r'(?:.*(?:length |\()(\d+))?'
+)
+
+PacketRecord = namedtuple('PacketRecord', [
+    'timestamp', 'src', 'src_host', 'src_port', 'dst', 'dst_host', 'dst_port',
+    'flags', 'seq', 'ack', 'win', 'length'
+])
+
+def is_ipv4(host):
+    return host.count('.') == 3 and host.replace('.', '').isdigit()
+
+def split_endpoint(endpoint):
+    # 192.168.1.2.80 -> ('192.168.1.2', '80'), BP-Linux8.ssh -> ('BP-Linux8', 'ssh')
+    if is_ipv4(endpoint):
+        return endpoint, None
+    host, _, port = endpoint.rpartition('.')
+    if not host:
+        return endpoint, None
+    return host, port
+
+def parse_packet_line(line):
+    # Les lignes hexadecimales (\t0x0000: ...) sont ecartees avant la regex
+    if line[:1] in CONTINUATION_PREFIXES:
+        return None
+    match = PACKET_LINE.match(line)
+    if match is None:
+        return None
+    timestamp, src, dst, flags, seq, ack, win, length = match.groups()
+    src_host, src_port = split_endpoint(src)
+    dst_host, dst_port = split_endpoint(dst)
+    return PacketRecord(timestamp, src, src_host, src_port, dst, dst_host, dst_port,
+                        flags, seq, ack, win, length)
+
+def iter_packets_with_payload(lines, pending=None, final=True):
+    # Regroupe chaque en-tete avec ses lignes hexadecimales (tcpdump -x/-X) ;
+    # les octets sont ajoutes en place au bytearray du paquet. pending garde
+    # le paquet ouvert entre deux lots : sans final, ses lignes hexadecimales
+    # peuvent encore arriver dans le lot suivant
+    record, packet = pending or (None, None)
+    for line in lines:
+        if line[:1] in CONTINUATION_PREFIXES:
+            if record is not None and line.startswith(HEX_PREFIX):
+                packet += bytes.fromhex(line[HEX_COLUMNS])
+            continue
+        if record is not None:
+            yield record, packet
+        record = parse_packet_line(line)
+        packet = bytearray()
+    if final:
+        if record is not None:
+            yield record, packet
+        record = packet = None
+    if pending is not None:
+        pending[:] = record, packet
+
+class TrafficAggregator:
+    """Computes every metric of the report in a single pass over the packets."""
+
+    def __init__(self, window=DEFAULT_WINDOW, burst_rate=DEFAULT_BURST_RATE,
+                 flow_ttl=DEFAULT_FLOW_TTL, max_flows=DEFAULT_MAX_FLOWS,
+                 approximate=False, top_k=DEFAULT_TOP_K, hll_precision=DEFAULT_HLL_PRECISION,
+                 flow_idle=DEFAULT_FLOW_IDLE, flow_writer=None, signatures=None):
+        # En mode approche, memoire fixe : Space-Saving pour les compteurs par
+        # cle et HyperLogLog pour les comptages distincts
+        if approximate:
+            self.protocols, self.talkers = SpaceSaving(top_k), SpaceSaving(top_k)
+            self.sources, self.destinations = HyperLogLog(hll_precision), HyperLogLog(hll_precision)
+            self.services = HyperLogLog(hll_precision)
+        else:
+            self.protocols, self.talkers = ExactCounter(), ExactCounter()
+            self.sources, self.destinations, self.services = ExactDistinct(), ExactDistinct(), ExactDistinct()
+        self.tcp_flags = {'SYN': 0, 'PUSH-ACK': 0, 'SYN-ACK': 0, 'ACK': 0}
+        self.packets_count = 0
+        self.bursts = BurstDetector(window, burst_rate)
+        self.handshakes = HandshakeTracker(flow_ttl, max_flows)
+        self.flows = FlowTable(flow_idle, max_flows, flow_writer) if flow_writer else None
+        self.bytes_count = 0
+        self._flag_masks = {}
+        # L'automate est construit une fois ; None desactive l'inspection du contenu
+        self.matcher = SignatureMatcher(signatures) if signatures else None
+        self.signature_hits = {}
+        self._open_packet = [None, None]
+
+    def add_record(self, record):
+        timestamp, src_host = record.timestamp, record.src_host
+        dst, flags = record.dst, record.flags
+        self.packets_count += 1
+        self.sources.add(src_host)
+        self.destinations.add(record.dst_host)
+        length = int(record.length or 0)
+        self.bytes_count += length
+        time_us = self.bursts.add(timestamp_to_us(timestamp), src_host, length)
+
+        self.talkers.add(src_host)
+        proto = record.dst_port or dst
+        self.protocols.add(proto)
+        if record.dst_port:
+            self.services.add(proto)
+
+        mask = 0
+        if flags is not None:
+            mask = self._flag_masks.get(flags)
+            if mask is None:
+                mask = self._flag_masks[flags] = flags_to_mask(flags)
+            self.handshakes.add(time_us, src_host, record.src_port, record.dst_host, record.dst_port, mask)
+        if self.flows is not None:
+            self.flows.add(time_us, src_host, record.src_port, record.dst_host, record.dst_port,
+                           length, mask, flags is not None)
+
+        if flags == 'S':
+            self.tcp_flags['SYN'] += 1
+        elif flags == 'P.':
+            self.tcp_flags['PUSH-ACK'] += 1
+        elif flags == 'S.':
+            self.tcp_flags['SYN-ACK'] += 1
+        elif flags == '.':
+            self.tcp_flags['ACK'] += 1
+
+    def add_lines(self, lines, final=True):
+        # final=False : d'autres lignes suivront (mode --follow), le dernier paquet reste ouvert
+        if self.matcher is None:
+            for record in filter(None, map(parse_packet_line, lines)):
+                self.add_record(record)
+            return
+        for record, packet in iter_packets_with_payload(lines, self._open_packet, final):
+            self.add_record(record)
+            self.add_payload(record, packet)
+
+    def add_payload(self, record, packet):
+        payload = transport_payload(packet)
+        if not payload:
+            return
+        hits = self.signature_hits
+        for _, signature in self.matcher.scan(payload):
+            key = (record.src_host, record.dst, signature)
+            entry = hits.get(key)
+            if entry is None:
+                if len(hits) >= MAX_TRACKED_KEYS:
+                    continue
+                entry = hits[key] = [record.timestamp, 0]
+            entry[1] += 1
+
+    def merge(self, other):
+        # other doit couvrir la portion de capture qui suit celle de self
+        self.packets_count += other.packets_count
+        self.bytes_count += other.bytes_count
+        self.protocols.merge(other.protocols)
+        self.talkers.merge(other.talkers)
+        self.sources.merge(other.sources)
+        self.destinations.merge(other.destinations)
+        self.services.merge(other.services)
+        for flag, count in other.tcp_flags.items():
+            self.tcp_flags[flag] += count
+        # Les instants de other sont recales sur le jour de self avant la fusion
+        shift = self.bursts.day_shift(other.bursts)
+        self.bursts.merge(other.bursts)
+        self.handshakes.merge(other.handshakes, shift)
+        for key, (timestamp, count) in other.signature_hits.items():
+            entry = self.signature_hits.get(key)
+            if entry is not None:
+                entry[1] += count
+            elif len(self.signature_hits) < MAX_TRACKED_KEYS:
+                self.signature_hits[key] = [timestamp, count]
+        return self
+
+    def to_stats(self):
+        return build_stats(self.packets_count, self.bytes_count, self.sources, self.destinations, self.services,
+                           self.tcp_flags,
+                           self.protocols, self.talkers, self.bursts, self.handshakes, self.flows,
+                           self.signature_hits)
+
+def format_error(relative):
+    return f"±{relative*100:.1f}%" if relative else '-'
+
+def build_stats(packets_count, bytes_count, sources, destinations, services, tcp_flags, protocols, talkers, bursts,
+                handshakes, flows=None, signature_hits=None):
+    duration = bursts.duration_us() / 1_000_000
+    sources_count, services_count = sources.count(), services.count()
+    by_source, by_service = handshakes.summary()
+    half_open = sum(entry['half_open'] for entry in by_service)
+    syn_total = max(sum(entry['syn'] for entry in by_service), 1)
+    suspicious = [entry for entry in by_source
+                  if entry['syn'] >= MIN_SYN_FOR_ALERT and entry['ratio'] >= HALF_OPEN_RATIO]
+    sources_total = max(sources_count, 1)
+
+    stats = {
+        'network_stats': {
+            'packets_analyzed': packets_count,
+            'packets_rate': f"{packets_count/duration if duration else packets_count:.1f}/s",
+            'bytes': bytes_count,
+            'bytes_rate': f"{bytes_count/duration if duration else bytes_count:.0f} o/s",
+            'anomalies': {
+                'count': half_open,
+                'percentage': f"{half_open/syn_total*100:.1f}%"
+            },
+            'suspicious_ips': {
+                'count': len(suspicious),
+                'percentage': f"{len(suspicious)/sources_total*100:.1f}%"
+            },
+            'services': {
+                'count': services_count,
+                'percentage': format_error(services.relative_error()),
+                'error': services.relative_error()
             },
-            'protocol_distribution': protocol_counts,
-            'detected_anomalies': []
+            'sources': {
+                'count': sources_count,
+                'error': sources.relative_error()
+            },
+            'destinations': {
+                'count': destinations.count(),
+                'error': destinations.relative_error()
+            },
+            'tcp_flags': dict(tcp_flags)
+        },
+        'protocol_distribution': Counter(dict(protocols.items())),
+        'protocols_max_error': protocols.max_error(),
+        'top_talkers': [{'source': source, 'count': count, 'error': error}
+                        for source, count, error in talkers.top(10)],
+        'half_open': {'by_source': by_source[:20], 'by_service': by_service[:20]},
+        'flows': flows.summary() if flows is not None else None,
+        'detected_anomalies': []
+    }
+
+    for entry in suspicious:
+        stats['detected_anomalies'].append({
+            'timestamp': us_to_timestamp(entry['last_us'] % DAY_US),
+            'ip_source': entry['key'],
+            'type': 'SYN Flood',
+            'details': f"{entry['half_open']} connexions semi-ouvertes sur {entry['syn']} SYN "
+                       f"({entry['ratio']*100:.0f}%)",
+            'level': 'HIGH'
+        })
+
+    for burst in bursts.snapshot():
+        start, end = us_to_timestamp(burst.start_us % DAY_US), us_to_timestamp(burst.end_us % DAY_US)
+        stats['detected_anomalies'].append({
+            'timestamp': start,
+            'window_start': start,
+            'window_end': end,
+            'ip_source': burst.source,
+            'type': 'Traffic Burst',
+            'details': f'Pic de trafic: {burst.packet_rate:.2f} paquets/s, '
+                       f'{burst.byte_rate:.0f} octets/s (de {start} a {end})',
+            'level': 'HIGH'
+        })
+
+    ranked_hits = sorted((signature_hits or {}).items(), key=lambda item: item[1][1], reverse=True)
+    for (source, destination, signature), (timestamp, count) in ranked_hits[:MAX_SIGNATURE_ALERTS]:
+        stats['detected_anomalies'].append({
+            'timestamp': timestamp,
+            'ip_source': source,
+            'type': 'Signature',
+            'details': f"Motif '{signature_label(signature)}' vers {destination} ({count} paquets)",
+            'level': 'HIGH'
+        })
+
+    return stats
+
+TCP_FLAG_BITS = {'F': 0x01, 'S': 0x02, 'R': 0x04, 'P': 0x08, '.': 0x10, 'U': 0x20, 'E': 0x40, 'W': 0x80}
+FLAG_SYN, FLAG_RST, FLAG_PUSH, FLAG_ACK = 0x02, 0x04, 0x08, 0x10
+REPORTED_FLAGS = {
+    'SYN': FLAG_SYN,
+    'PUSH-ACK': FLAG_PUSH | FLAG_ACK,
+    'SYN-ACK': FLAG_SYN | FLAG_ACK,
+    'ACK': FLAG_ACK,
+}
+
+def flags_to_mask(flags):
+    mask = 0
+    for letter in flags or '':
+        mask |= TCP_FLAG_BITS.get(letter, 0)
+    return mask
+
+def timestamp_to_us(timestamp):
+    hours, minutes, seconds = timestamp.split(':')
+    return (int(hours) * 3600 + int(minutes) * 60) * 1_000_000 + int(seconds.replace('.', ''))
+
+def us_to_timestamp(us):
+    seconds, micro = divmod(us, 1_000_000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{micro:06d}"
+
+Burst = namedtuple('Burst', ['source', 'start_us', 'end_us', 'packet_rate', 'byte_rate'])
+
+class BurstDetector:
+    """Per-source packet and byte rates over a sliding window of `window` seconds.
+
+    Each packet enters and leaves the window once, so the cost is O(1) amortized
+    and memory only depends on the traffic inside the window. A burst opens when
+    a source goes above `burst_rate` packets/s and closes when it falls back.
+    Only the `max_bursts` strongest closed bursts are kept.
+
+    The packets of the first window (`head`) are kept so that merge can replay
+    them after the previous chunk: --workers gives the same bursts as one pass.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, burst_rate=DEFAULT_BURST_RATE, max_bursts=MAX_BURST_ALERTS):
+        self.window_us = int(window * 1_000_000)
+        self.max_bursts = max_bursts
+        self.window = window
+        self.threshold = burst_rate * window
+        self.events = deque()
+        self.packets = Counter()
+        self.volume = Counter()
+        self.open_bursts = {}
+        self.closed_bursts = []
+        self.first_us = None
+        self.last_us = None
+        self._day_offset = 0
+        self.head = []
+        self.head_complete = False
+        # Pics fermes pendant le debut, ou ouverts a sa fin puis fermes : le
+        # rejeu de merge les recalcule avec les paquets du bloc precedent
+        self.head_bursts = []
+        self.carried = {}
+
+    def _clock(self, time_us):
+        # Les horodatages tcpdump sont des heures de la journee : on deroule minuit
+        time_us += self._day_offset
+        if self.last_us is not None and time_us < self.last_us - DAY_US // 2:
+            self._day_offset += DAY_US
+            time_us += DAY_US
+        return time_us
+
+    def add(self, time_us, source, length=0):
+        now = self._clock(time_us)
+        if self.first_us is None:
+            self.first_us = now
+        self.last_us = now
+        if not self.head_complete:
+            self.head.append((now, source, length))
+        self._push(now, source, length)
+        if not self.head_complete and now - self.first_us >= self.window_us:
+            # Les paquets anterieurs au bloc sont sortis de la fenetre : les
+            # compteurs ne dependent plus que du bloc
+            self.head_complete = True
+            for burst in self.open_bursts.values():
+                burst[4] = True
+        return now
+
+    def _push(self, now, source, length):
+        events, packets, volume = self.events, self.packets, self.volume
+        horizon = now - self.window_us
+        while events and events[0][0] <= horizon:
+            _, old_source, old_length = events.popleft()
+            packets[old_source] -= 1
+            volume[old_source] -= old_length
+            if packets[old_source] <= self.threshold and old_source in self.open_bursts:
+                self._close(old_source)
+            if not packets[old_source]:
+                del packets[old_source]
+                del volume[old_source]
+
+        events.append((now, source, length))
+        packets[source] += 1
+        volume[source] += length
+        count = packets[source]
+        if count > self.threshold:
+            burst = self.open_bursts.get(source)
+            if burst is None:
+                self.open_bursts[source] = [max(horizon, self.first_us), now, count, volume[source], False]
+            else:
+                burst[1] = now
+                burst[2] = max(burst[2], count)
+                burst[3] = max(burst[3], volume[source])
+
+    def _close(self, source):
+        start_us, end_us, peak_packets, peak_bytes, carried = self.open_bursts.pop(source)
+        burst = Burst(source, start_us, end_us, peak_packets / self.window, peak_bytes / self.window)
+        if carried:
+            self.carried[source] = burst
+        elif not self.head_complete:
+            self.head_bursts.append(burst)
+        else:
+            self._keep(burst)
+
+    def _keep(self, burst):
+        self.closed_bursts.append(burst)
+        if len(self.closed_bursts) >= 2 * self.max_bursts:
+            self._trim()
+
+    def _trim(self):
+        self.closed_bursts = heapq.nlargest(self.max_bursts, self.closed_bursts,
+                                            key=lambda burst: burst.packet_rate)
+
+    def duration_us(self):
+        if self.first_us is None:
+            return 0
+        return self.last_us - self.first_us
+
+    def snapshot(self):
+        opened = [Burst(source, start, end, peak / self.window, volume / self.window)
+                  for source, (start, end, peak, volume, _) in self.open_bursts.items()]
+        bursts = self.head_bursts + list(self.carried.values()) + self.closed_bursts + opened
+        if len(bursts) > self.max_bursts:
+            bursts = heapq.nlargest(self.max_bursts, bursts, key=lambda burst: burst.packet_rate)
+        return sorted(bursts, key=lambda burst: burst.start_us)
+
+    def day_shift(self, other):
+        # Chaque bloc deroule minuit a partir de son propre debut : un bloc qui
+        # commence bien avant la fin du precedent a passe minuit entre les deux
+        shift = 0
+        if self.last_us is not None and other.first_us is not None:
+            while other.first_us + shift < self.last_us - DAY_US // 2:
+                shift += DAY_US
+        return shift
+
+    def merge(self, other):
+        # other suit self dans la capture. Son debut est rejoue apres la derniere
+        # fenetre de self : ensuite les deux detecteurs ont les memes compteurs,
+        # les pics suivants de other sont repris tels quels et ceux ouverts a ce
+        # moment prolongent les pics ouverts de self
+        if other.first_us is None:
+            return self
+        shift = self.day_shift(other)
+        if self.first_us is None:
+            self.first_us = other.first_us + shift
+        if not self.head_complete:
+            self.head_complete = True
+            for burst in self.head_bursts:
+                self._keep(burst)
+            self.head, self.head_bursts = [], []
+        for now, source, length in other.head:
+            self._push(now + shift, source, length)
+        self.last_us = other.last_us + shift
+        self._day_offset = other._day_offset + shift
+        if not other.head_complete:
+            return self
+
+        opened = {}
+        for source, (start, end, peak, volume, carried) in other.open_bursts.items():
+            mine = self.open_bursts.pop(source, None) if carried else None
+            if mine is not None:
+                opened[source] = [mine[0], end + shift, max(mine[2], peak), max(mine[3], volume), False]
+            else:
+                opened[source] = [start + shift, end + shift, peak, volume, False]
+        for source, burst in other.carried.items():
+            mine = self.open_bursts.pop(source, None)
+            burst = burst._replace(start_us=burst.start_us + shift, end_us=burst.end_us + shift)
+            if mine is not None:
+                burst = Burst(source, mine[0], burst.end_us, max(mine[2] / self.window, burst.packet_rate),
+                              max(mine[3] / self.window, burst.byte_rate))
+            self._keep(burst)
+        for source in list(self.open_bursts):
+            self._close(source)
+        self.open_bursts = opened
+        for burst in other.closed_bursts:
+            self._keep(burst._replace(start_us=burst.start_us + shift, end_us=burst.end_us + shift))
+        self.events = deque((now + shift, source, length) for now, source, length in other.events)
+        self.packets, self.volume = Counter(other.packets), Counter(other.volume)
+        return self
+
+FLOW_SYN, FLOW_SYN_ACK, FLOW_DONE, FLOW_ACK = 1, 2, 3, 4
+OTHER_KEY = 'autres'
+
+class HandshakeCounters:
+    """SYN / completed / half-open counters per key, capped to `limit` keys.
+
+    Keys seen once the table is full are added to a shared 'autres' entry, so a
+    flood of spoofed sources cannot grow it without bound.
+    """
+
+    def __init__(self, limit=MAX_TRACKED_KEYS):
+        self.limit = limit
+        self.counters = {}
+
+    def get(self, key):
+        counters = self.counters.get(key)
+        if counters is None:
+            if len(self.counters) >= self.limit:
+                key = OTHER_KEY
+                counters = self.counters.get(key)
+            if counters is None:
+                counters = self.counters[key] = [0, 0, 0, 0]  # syn, termines, semi-ouverts, dernier us
+        return counters
+
+    def merge(self, other, shift=0):
+        for key, (syn, done, half_open, last_us) in other.counters.items():
+            counters = self.get(key)
+            counters[0] += syn
+            counters[1] += done
+            counters[2] += half_open
+            counters[3] = max(counters[3], last_us + shift)
+
+    def summary(self, pending):
+        rows = []
+        for key, (syn, done, half_open, last_us) in self.counters.items():
+            half_open += pending.get(key, 0)
+            rows.append({'key': key, 'syn': syn, 'completed': done, 'half_open': half_open,
+                         'ratio': half_open / syn if syn else 0.0, 'last_us': last_us})
+        rows.sort(key=lambda row: row['half_open'], reverse=True)
+        return rows
+
+class HandshakeTracker:
+    """Follows TCP handshakes (S -> S. -> .) per 4-tuple with bounded memory.
+
+    Pending flows live in an OrderedDict ordered by last activity: flows idle for
+    more than `ttl` seconds, or the oldest ones once `max_flows` is reached, are
+    evicted and counted as half-open for their source and destination service.
+    """
+
+    def __init__(self, ttl=DEFAULT_FLOW_TTL, max_flows=DEFAULT_MAX_FLOWS):
+        self.ttl_us = int(ttl * 1_000_000)
+        self.max_flows = max_flows
+        self.flows = OrderedDict()
+        # Reponses vues sans le SYN correspondant (connexion ouverte avant le
+        # debut de la capture, ou dans le bloc precedent en mode --workers)
+        self.orphans = OrderedDict()
+        # SYN des `ttl` premieres secondes : peut-etre des retransmissions d'un
+        # SYN du bloc precedent, a ne pas compter deux fois a la fusion
+        self.early_syns = set()
+        self.first_us = None
+        self.by_source = HandshakeCounters()
+        self.by_service = HandshakeCounters()
+
+    def add(self, time_us, src, sport, dst, dport, mask):
+        if self.first_us is None:
+            self.first_us = time_us
+        early = time_us - self.first_us <= self.ttl_us
+        if mask & FLAG_SYN and not mask & FLAG_ACK:
+            key = (src, sport, dst, dport)
+            if key not in self.flows:
+                self._count(key, 0, time_us)
+                if early and len(self.early_syns) < self.max_flows:
+                    self.early_syns.add(key)
+            self.flows[key] = [FLOW_SYN, time_us]
+            self.flows.move_to_end(key)
+            self._evict(time_us)
+            return
+
+        key = (dst, dport, src, sport)
+        if mask & FLAG_SYN:
+            flow = self.flows.get(key)
+            if flow is not None:
+                flow[0], flow[1] = FLOW_SYN_ACK, time_us
+                self.flows.move_to_end(key)
+            else:
+                self._orphan(key, FLOW_SYN_ACK)
+            return
+
+        key = (src, sport, dst, dport)
+        if mask & FLAG_RST:
+            self.flows.pop(key, None) or self.flows.pop((dst, dport, src, sport), None)
+            return
+        if mask & FLAG_ACK:
+            flow = self.flows.get(key)
+            if flow is not None and flow[0] == FLOW_SYN_ACK:
+                del self.flows[key]
+                self._count(key, 1, time_us)
+            elif flow is None:
+                state = self.orphans.get(key)
+                if state == FLOW_SYN_ACK:
+                    self.orphans[key] = FLOW_DONE
+                elif state is None and early:
+                    # Peut terminer une poignee de main dont le S. est dans le bloc precedent
+                    self._orphan(key, FLOW_ACK)
+
+    def _count(self, key, column, time_us, amount=1):
+        for counters in (self.by_source.get(key[0]), self.by_service.get(key[3])):
+            counters[column] += amount
+            counters[3] = max(counters[3], time_us)
+
+    def _orphan(self, key, state):
+        self.orphans[key] = state
+        if len(self.orphans) > self.max_flows:
+            self.orphans.popitem(last=False)
+
+    def _evict(self, now):
+        flows = self.flows
+        horizon = now - self.ttl_us
+        while flows:
+            key, (state, last_us) = next(iter(flows.items()))
+            if len(flows) <= self.max_flows and last_us >= horizon:
+                break
+            del flows[key]
+            self._count(key, 2, last_us)
+
+    def pending(self):
+        by_source, by_service = Counter(), Counter()
+        for src, _, _, dport in self.flows:
+            by_source[src] += 1
+            by_service[dport] += 1
+        return by_source, by_service
+
+    def summary(self):
+        pending_source, pending_service = self.pending()
+        # Les cles au-dela de la limite sont comptees dans 'autres'
+        for pending, counters in ((pending_source, self.by_source), (pending_service, self.by_service)):
+            for key in [key for key in pending if key not in counters.counters]:
+                pending[OTHER_KEY] += pending.pop(key)
+        return self.by_source.summary(pending_source), self.by_service.summary(pending_service)
+
+    def merge(self, other, shift=0):
+        # other suit self : ses reponses orphelines terminent les poignees de
+        # main ouvertes a la fin du bloc precedent ; shift recale ses instants
+        self.by_source.merge(other.by_source, shift)
+        self.by_service.merge(other.by_service, shift)
+        for key, (state, last_us) in list(self.flows.items()):
+            if key in other.early_syns:
+                # SYN retransmis : other a compte la connexion et la suit desormais
+                del self.flows[key]
+                self._count(key, 0, last_us, -1)
+                continue
+            answer = other.orphans.get(key)
+            if answer == FLOW_DONE or (answer == FLOW_ACK and state == FLOW_SYN_ACK):
+                del self.flows[key]
+                self._count(key, 1, last_us)
+            elif answer == FLOW_SYN_ACK:
+                self.flows[key][0] = FLOW_SYN_ACK
+        for key, (state, last_us) in other.flows.items():
+            self.flows.pop(key, None)
+            self.flows[key] = [state, last_us + shift]
+        for key, state in other.orphans.items():
+            if key not in self.flows:
+                self._orphan(key, state)
+        if self.flows:
+            self._evict(next(reversed(self.flows.values()))[1])
+        return self
+
+Flow = namedtuple('Flow', ['protocol', 'src', 'sport', 'dst', 'dport', 'first_us', 'last_us',
+                           'packets', 'bytes', 'flags'])
+FLOW_CSV_HEADER = ['debut', 'fin', 'protocole', 'ip_source', 'port_source', 'ip_dest', 'port_dest',
+                   'paquets', 'octets', 'drapeaux']
+
+def mask_to_flags(mask):
+    return ''.join(letter for letter, bit in TCP_FLAG_BITS.items() if mask & bit)
+
+class FlowTable:
+    """Bidirectional 5-tuple flows with idle-timeout eviction.
+
+    Flows are kept in an OrderedDict ordered by last activity, so expired flows
+    are always at the front. Each finished flow is handed to `on_expire` (for
+    example a CSV writer) and forgotten; only the largest ones are remembered
+    for the report.
+    """
+
+    def __init__(self, idle_timeout=DEFAULT_FLOW_IDLE, max_flows=DEFAULT_MAX_FLOWS, on_expire=None, top=10):
+        self.idle_us = int(idle_timeout * 1_000_000)
+        self.max_flows = max_flows
+        self.on_expire = on_expire
+        self.flows = OrderedDict()
+        self.expired = 0
+        self.top = top
+        self._largest = []
+
+    def add(self, time_us, src, sport, dst, dport, length, mask, tcp):
+        protocol = 'tcp' if tcp else ('udp' if sport else 'ip')
+        sport, dport = sport or '', dport or ''
+        if (src, sport) <= (dst, dport):
+            key = (protocol, src, sport, dst, dport)
+        else:
+            key = (protocol, dst, dport, src, sport)
+        flow = self.flows.get(key)
+        if flow is None:
+            # L'initiateur est la source du premier paquet vu
+            flow = self.flows[key] = [time_us, time_us, 0, 0, 0, src, sport, dst, dport]
+        else:
+            self.flows.move_to_end(key)
+        flow[1] = time_us
+        flow[2] += 1
+        flow[3] += length
+        flow[4] |= mask
+        self._expire(time_us)
+
+    def _expire(self, now):
+        flows = self.flows
+        horizon = now - self.idle_us
+        while flows:
+            oldest = next(iter(flows.values()))
+            if len(flows) <= self.max_flows and oldest[1] >= horizon:
+                break
+            key, flow = flows.popitem(last=False)
+            self._finish(key[0], flow)
+
+    def _finish(self, protocol, values):
+        first_us, last_us, packets, volume, mask, src, sport, dst, dport = values
+        flow = Flow(protocol, src, sport, dst, dport, first_us, last_us, packets, volume, mask_to_flags(mask))
+        self.expired += 1
+        if self.on_expire is not None:
+            self.on_expire(flow)
+        entry = (volume, self.expired, flow)
+        if len(self._largest) < self.top:
+            heapq.heappush(self._largest, entry)
+        elif entry > self._largest[0]:
+            heapq.heapreplace(self._largest, entry)
+
+    def flush(self):
+        while self.flows:
+            key, flow = self.flows.popitem(last=False)
+            self._finish(key[0], flow)
+
+    def summary(self):
+        largest = [flow for _, _, flow in sorted(self._largest, reverse=True)]
+        return {
+            'active': len(self.flows),
+            'expired': self.expired,
+            'largest': [{'protocol': flow.protocol, 'source': f"{flow.src}:{flow.sport}",
+                         'destination': f"{flow.dst}:{flow.dport}", 'packets': flow.packets,
+                         'bytes': flow.bytes, 'flags': flow.flags} for flow in largest],
         }
 
-        threshold = len(packets) / len(set(p['source'] for p in packets)) * 2
-        for src, count in ip_counts.items():
-            if count > threshold:
-                stats['detected_anomalies'].append({
-                    'timestamp': packets[0]['timestamp'] if packets else '',
-                    'ip_source': src,
-                    'type': 'Traffic Burst',
-                    'details': f'Pic de trafic: {count/60:.2f} paquets/s',
-                    'level': 'HIGH'
-                })
+class FlowCsvWriter:
+    """Streams expired flows to a CSV file as they are evicted."""
+
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8', newline='', buffering=READ_BUFFER_SIZE)
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(FLOW_CSV_HEADER)
+
+    def __call__(self, flow):
+        self.writer.writerow([us_to_timestamp(flow.first_us % DAY_US), us_to_timestamp(flow.last_us % DAY_US),
+                              flow.protocol, flow.src, flow.sport, flow.dst, flow.dport,
+                              flow.packets, flow.bytes, flow.flags])
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class StringDictionary:
+    """Interns strings into dense integer ids."""
+
+    def __init__(self):
+        self.values = []
+        self.ids = {}
+
+    def intern(self, value):
+        ident = self.ids.get(value)
+        if ident is None:
+            ident = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return ident
+
+    def __len__(self):
+        return len(self.values)
+
+class PacketTable:
+    """Columnar packet store: one typed array per field, hosts and ports interned."""
+
+    COLUMNS = {
+        'timestamps': 'q', 'src_hosts': 'I', 'src_ports': 'I',
+        'dst_hosts': 'I', 'dst_ports': 'I', 'flags': 'B', 'lengths': 'I',
+    }
+    NUMPY_TYPES = {'q': 'int64', 'I': 'uint32', 'B': 'uint8'}
+
+    def __init__(self):
+        self.hosts = StringDictionary()
+        self.ports = StringDictionary()
+        self.ports.intern('')  # id 0 : pas de port
+        self._flag_masks = {}
+        for name, typecode in self.COLUMNS.items():
+            setattr(self, name, array(typecode))
+
+    def append(self, record):
+        flags = self._flag_masks.get(record.flags)
+        if flags is None:
+            flags = self._flag_masks[record.flags] = flags_to_mask(record.flags)
+        self.timestamps.append(timestamp_to_us(record.timestamp))
+        self.src_hosts.append(self.hosts.intern(record.src_host))
+        self.src_ports.append(self.ports.intern(record.src_port or ''))
+        self.dst_hosts.append(self.hosts.intern(record.dst_host))
+        self.dst_ports.append(self.ports.intern(record.dst_port or ''))
+        self.flags.append(flags)
+        self.lengths.append(int(record.length or 0))
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def column(self, name):
+        values = getattr(self, name)
+        np = charger_numpy()
+        if np is None:
+            return values
+        return np.frombuffer(values, dtype=self.NUMPY_TYPES[values.typecode])
+
+    def _counts(self, name, where=None):
+        values = self.column(name)
+        np = charger_numpy()
+        if np is not None:
+            if where is not None:
+                values = values[where]
+            counts = np.bincount(values)
+            return {int(ident): int(counts[ident]) for ident in np.flatnonzero(counts)}
+        if where is not None:
+            values = (value for value, keep in zip(values, where) if keep)
+        return Counter(values)
+
+    def flagged_rows(self):
+        # Positions des paquets TCP portant au moins un flag, seuls utiles au suivi des poignees de main
+        flags = self.column('flags')
+        np = charger_numpy()
+        if np is not None:
+            return np.flatnonzero(flags).tolist()
+        return [row for row, mask in enumerate(flags) if mask]
+
+    def total_bytes(self):
+        lengths = self.column('lengths')
+        np = charger_numpy()
+        return int(lengths.sum(dtype=np.int64)) if np is not None else sum(lengths)
+
+    def source_counts(self):
+        hosts = self.hosts.values
+        return ExactCounter({hosts[ident]: count for ident, count in self._counts('src_hosts').items()})
 
-        return stats
+    def to_stats(self, window=DEFAULT_WINDOW, burst_rate=DEFAULT_BURST_RATE,
+                 flow_ttl=DEFAULT_FLOW_TTL, max_flows=DEFAULT_MAX_FLOWS):
+        flag_counts = self._counts('flags')
+        tcp_flags = {name: flag_counts.get(mask, 0) for name, mask in REPORTED_FLAGS.items()}
+
+        ports = self._counts('dst_ports')
+        protocols = ExactCounter({self.ports.values[ident]: count for ident, count in ports.items() if ident})
+        if 0 in ports:
+            dst_ports = self.column('dst_ports')
+            no_port = dst_ports == 0 if charger_numpy() is not None else [port == 0 for port in dst_ports]
+            for ident, count in self._counts('dst_hosts', no_port).items():
+                protocols[self.hosts.values[ident]] += count
+
+        # Les horodatages sont des heures de la journee : les poignees de main
+        # recoivent les instants deroules apres minuit par le detecteur de pics
+        bursts = BurstDetector(window, burst_rate)
+        hosts = self.hosts.values
+        times = array('q', (bursts.add(time_us, hosts[source], length)
+                            for time_us, source, length in zip(self.timestamps, self.src_hosts, self.lengths)))
+
+        # Les debits et les poignees de main dependent de l'ordre des paquets : boucles Python,
+        # mais seulement sur les paquets qui portent des flags pour les poignees de main
+        handshakes = HandshakeTracker(flow_ttl, max_flows)
+        port_names = self.ports.values
+        for row in self.flagged_rows():
+            handshakes.add(times[row], hosts[self.src_hosts[row]],
+                           port_names[self.src_ports[row]] or None, hosts[self.dst_hosts[row]],
+                           port_names[self.dst_ports[row]] or None, self.flags[row])
+
+        talkers = self.source_counts()
+        return build_stats(len(self), self.total_bytes(), ExactDistinct(talkers),
+                           ExactDistinct(self._counts('dst_hosts')), ExactDistinct(ident for ident in ports if ident),
+                           tcp_flags, protocols, talkers, bursts, handshakes)
+
+def iter_capture_records(file_path):
+    # Capture binaire pcap/pcapng ou sortie texte de tcpdump
+    if is_pcap_file(file_path):
+        yield from iter_pcap_records(file_path, PacketRecord._make)
+        return
+    with open(file_path, 'r', encoding='utf-8', buffering=READ_BUFFER_SIZE) as file:
+        yield from filter(None, map(parse_packet_line, file))
+
+def load_packet_table(file_path):
+    table = PacketTable()
+    for record in iter_capture_records(file_path):
+        table.append(record)
+    return table
+
+def is_continuation_line(line):
+    return line[:1] in (b'\t', b' ')
+
+def _next_packet_offset(file, offset):
+    # Avance jusqu'au debut de la prochaine ligne d'en-tete, pour qu'un paquet
+    # et ses lignes hexadecimales restent dans le meme bloc
+    if offset == 0:
+        return 0
+    file.seek(offset - 1)
+    file.readline()
+    while True:
+        position = file.tell()
+        line = file.readline()
+        if not line or not is_continuation_line(line):
+            return position
+
+def split_capture(file_path, chunks):
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as file:
+        offsets = [_next_packet_offset(file, size * i // chunks) for i in range(chunks)]
+    offsets.append(size)
+    return [(file_path, start, end) for start, end in zip(offsets, offsets[1:]) if start < end]
+
+def _analyze_range(task):
+    file_path, start, end, options = task
+    aggregator = TrafficAggregator(**options)
+    with open(file_path, 'rb', buffering=READ_BUFFER_SIZE) as file:
+        file.seek(start)
+        aggregator.add_lines(_read_range(file, start, end))
+    return aggregator
+
+def _read_range(file, start, end):
+    position = start
+    while position < end:
+        line = file.readline()
+        if not line:
+            break
+        position += len(line)
+        yield line.decode('utf-8', 'replace')
+
+def analyze_tcpdump(file_path, workers=1, columnar=False, flows_csv=None, **options):
+    try:
+        if columnar:
+            return load_packet_table(file_path).to_stats(**options)
+
+        # L'export des flux se fait en une seule passe pour ne pas couper les
+        # flux a cheval sur deux blocs
+        if workers > 1 and not flows_csv and not is_pcap_file(file_path):
+            aggregator = TrafficAggregator(**options)
+            chunks = max(1, min(workers * 4, os.path.getsize(file_path) // MIN_CHUNK_SIZE))
+            tasks = [chunk + (options,) for chunk in split_capture(file_path, chunks)]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for partial in pool.map(_analyze_range, tasks):
+                    aggregator.merge(partial)
+            return aggregator.to_stats()
+
+        writer = FlowCsvWriter(flows_csv) if flows_csv else None
+        try:
+            aggregator = TrafficAggregator(flow_writer=writer, **options)
+            if aggregator.matcher is not None and not is_pcap_file(file_path):
+                with open(file_path, 'r', encoding='utf-8', buffering=READ_BUFFER_SIZE) as file:
+                    aggregator.add_lines(file)
+            else:
+                for record in iter_capture_records(file_path):
+                    aggregator.add_record(record)
+            if aggregator.flows is not None:
+                aggregator.flows.flush()
+            return aggregator.to_stats()
+        finally:
+            if writer is not None:
+                writer.close()
 
     except Exception as e:
         print(f"Erreur lors de l'analyse du fichier: {str(e)}")
         return None
 
-def generate_flags_chart(tcp_flags):
-    plt.figure(figsize=(12, 8))
-    sns.set_style("whitegrid")
+class CaptureFollower:
+    """Reads the lines appended to a capture file, like `tail -F`.
+
+    Truncation restarts reading from the beginning of the file, and rotation
+    (the path now points to another inode) switches to the new file once the
+    old one has been read to the end.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.file = None
+        self.inode = None
+        self.pending = b''
+
+    def _open(self):
+        try:
+            self.file = open(self.file_path, 'rb')
+        except FileNotFoundError:
+            return False
+        self.inode = os.fstat(self.file.fileno()).st_ino
+        self.pending = b''
+        return True
+
+    def _check_file(self):
+        try:
+            current = os.stat(self.file_path)
+        except FileNotFoundError:
+            return []
+        if current.st_ino != self.inode:
+            leftover = [self.pending] if self.pending else []
+            self.close()
+            return leftover
+        if current.st_size < self.file.tell():
+            self.file.seek(0)
+            self.pending = b''
+        return []
+
+    def read_lines(self):
+        if self.file is None and not self._open():
+            return []
+        chunk = self.file.read(READ_BUFFER_SIZE)
+        if not chunk:
+            return [line.decode('utf-8', 'replace') for line in self._check_file()]
+        lines = (self.pending + chunk).split(b'\n')
+        self.pending = lines.pop()
+        return [line.decode('utf-8', 'replace') for line in lines]
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+        self.file = None
+
+def print_snapshot(stats):
+    network = stats['network_stats']
+    print(f"[{time.strftime('%H:%M:%S')}] {network['packets_analyzed']} paquets, "
+          f"{network['packets_rate']}, {network['anomalies']['count']} connexions semi-ouvertes, "
+          f"{len(stats['detected_anomalies'])} alertes")
+
+def follow_tcpdump(file_path, interval=10.0, on_snapshot=None, poll=0.5, max_snapshots=None,
+                   flows_csv=None, **options):
+    writer = FlowCsvWriter(flows_csv) if flows_csv else None
+    aggregator = TrafficAggregator(flow_writer=writer, **options)
+    follower = CaptureFollower(file_path)
+    next_snapshot = time.monotonic() + interval
+    snapshots = 0
+    try:
+        while max_snapshots is None or snapshots < max_snapshots:
+            lines = follower.read_lines()
+            aggregator.add_lines(lines, final=False)
+
+            if time.monotonic() >= next_snapshot:
+                stats = aggregator.to_stats()
+                if on_snapshot is None:
+                    generate_html_report(stats, open_browser=False)
+                    print_snapshot(stats)
+                else:
+                    on_snapshot(stats)
+                if writer is not None:
+                    writer.flush()
+                snapshots += 1
+                next_snapshot += interval
 
+            if not lines:
+                time.sleep(poll)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        follower.close()
+        aggregator.add_lines([])
+        if writer is not None:
+            aggregator.flows.flush()
+            writer.close()
+    return aggregator.to_stats()
+
+def flags_chart_spec(tcp_flags, image_format='png'):
     flags, counts = zip(*tcp_flags.items())
-    sns.barplot(x=list(flags), y=list(counts), palette='Blues_d')
+    return bar_chart(flags, counts, 'TCP Flags Distribution', 'TCP Flags', 'Count', figsize=(12, 8),
+                     rotate_labels=True, seaborn_style='whitegrid', palette='Blues_d', title_size=14,
+                     label_size=12, image_format=image_format)
+
+def generate_html_report(stats, output_path='analyse.html', open_browser=True, assets_dir=None,
+                         image_format='png'):
+    spec = flags_chart_spec(stats['network_stats']['tcp_flags'], image_format)
+    if assets_dir:
+        # Image a part, referencee par URL : le HTML n'embarque plus le PNG en base64
+        chart_src = relative_url(ChartCache(assets_dir).render([spec])[0], output_path)
+    else:
+        chart_src = data_uri(ChartCache(default_cache_dir(output_path)).render([spec])[0])
 
-    plt.xlabel('TCP Flags', fontsize=12)
-    plt.ylabel('Count', fontsize=12)
-    plt.title('TCP Flags Distribution', fontsize=14)
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    
-    return plot_to_base64()
-
-def plot_to_base64():
-    buffer = BytesIO()
-    plt.savefig(buffer, format='png')
-    buffer.seek(0)
-    image_png = buffer.getvalue()
-    buffer.close()
-    plt.close()
-    return base64.b64encode(image_png).decode()
-
-def generate_html_report(stats):
     html_content = f"""
     <!DOCTYPE html>
     <html lang="fr">
@@ -186,6 +1151,12 @@ def generate_html_report(stats):
                     <div class="subvalue">{stats['network_stats']['packets_rate']}</div>
                 </div>
                 
+                <div class="stat-card">
+                    <h3>Volume</h3>
+                    <div class="value">{stats['network_stats']['bytes']} o</div>
+                    <div class="subvalue">{stats['network_stats']['bytes_rate']}</div>
+                </div>
+
                 <div class="stat-card">
                     <h3>Anomalies</h3>
                     <div class="value">{stats['network_stats']['anomalies']['count']}</div>
@@ -198,6 +1169,18 @@ def generate_html_report(stats):
                     <div class="subvalue">{stats['network_stats']['suspicious_ips']['percentage']}</div>
                 </div>
                 
+                <div class="stat-card">
+                    <h3>Sources</h3>
+                    <div class="value">{stats['network_stats']['sources']['count']}</div>
+                    <div class="subvalue">{format_error(stats['network_stats']['sources']['error'])}</div>
+                </div>
+
+                <div class="stat-card">
+                    <h3>Destinations</h3>
+                    <div class="value">{stats['network_stats']['destinations']['count']}</div>
+                    <div class="subvalue">{format_error(stats['network_stats']['destinations']['error'])}</div>
+                </div>
+
                 <div class="stat-card">
                     <h3>Services</h3>
                     <div class="value">{stats['network_stats']['services']['count']}</div>
@@ -206,7 +1189,7 @@ def generate_html_report(stats):
             </div>
 
             <div class="charts-section">
-                <img src="data:image/png;base64,{generate_flags_chart(stats['network_stats']['tcp_flags'])}" 
+                <img src="{html.escape(chart_src)}" 
                      alt="TCP Flags Distribution" style="width:100%">
             </div>
             
@@ -225,11 +1208,112 @@ def generate_html_report(stats):
     for anomaly in stats['detected_anomalies']:
         html_content += f"""
                     <tr>
-                        <td>{anomaly['timestamp']}</td>
-                        <td>{anomaly['ip_source']}</td>
-                        <td>{anomaly['type']}</td>
-                        <td>{anomaly['details']}</td>
-                        <td class="level-high">{anomaly['level']}</td>
+                        <td>{html.escape(anomaly['timestamp'])}</td>
+                        <td>{html.escape(anomaly['ip_source'])}</td>
+                        <td>{html.escape(anomaly['type'])}</td>
+                        <td>{html.escape(anomaly['details'])}</td>
+                        <td class="level-high">{html.escape(anomaly['level'])}</td>
+                    </tr>
+        """
+
+    html_content += """
+                </table>
+            </div>
+
+            <div class="stats-section">
+                <h2>Principales sources</h2>
+                <table class="anomalies-table">
+                    <tr>
+                        <th>Source</th>
+                        <th>Paquets</th>
+                    </tr>
+    """
+
+    for talker in stats['top_talkers']:
+        error = f" (±{talker['error']})" if talker['error'] else ''
+        html_content += f"""
+                    <tr>
+                        <td>{html.escape(talker['source'])}</td>
+                        <td>{talker['count']}{error}</td>
+                    </tr>
+        """
+
+    html_content += """
+                </table>
+            </div>
+
+            <div class="stats-section">
+                <h2>Principaux protocoles</h2>
+                <table class="anomalies-table">
+                    <tr>
+                        <th>Protocole</th>
+                        <th>Paquets</th>
+                    </tr>
+    """
+
+    # Borne commune a tous les compteurs en mode approche (Space-Saving)
+    error = f" (±{stats['protocols_max_error']})" if stats['protocols_max_error'] else ''
+    for protocol, count in stats['protocol_distribution'].most_common(10):
+        html_content += f"""
+                    <tr>
+                        <td>{html.escape(protocol)}</td>
+                        <td>{count}{error}</td>
+                    </tr>
+        """
+
+    html_content += """
+                </table>
+            </div>
+
+            <div class="stats-section">
+                <h2>Flux principaux</h2>
+                <table class="anomalies-table">
+                    <tr>
+                        <th>Protocole</th>
+                        <th>Source</th>
+                        <th>Destination</th>
+                        <th>Paquets</th>
+                        <th>Octets</th>
+                        <th>Drapeaux</th>
+                    </tr>
+    """
+
+    for flow in (stats['flows'] or {}).get('largest', []):
+        html_content += f"""
+                    <tr>
+                        <td>{html.escape(flow['protocol'])}</td>
+                        <td>{html.escape(flow['source'])}</td>
+                        <td>{html.escape(flow['destination'])}</td>
+                        <td>{flow['packets']}</td>
+                        <td>{flow['bytes']}</td>
+                        <td>{html.escape(flow['flags'])}</td>
+                    </tr>
+        """
+
+    html_content += """
+                </table>
+            </div>
+
+            <div class="stats-section">
+                <h2>Connexions semi-ouvertes</h2>
+                <table class="anomalies-table">
+                    <tr>
+                        <th>Source / Service</th>
+                        <th>SYN</th>
+                        <th>Terminées</th>
+                        <th>Semi-ouvertes</th>
+                        <th>Taux</th>
+                    </tr>
+    """
+
+    for entry in stats['half_open']['by_source'][:10] + stats['half_open']['by_service'][:10]:
+        html_content += f"""
+                    <tr>
+                        <td>{html.escape(entry['key'])}</td>
+                        <td>{entry['syn']}</td>
+                        <td>{entry['completed']}</td>
+                        <td>{entry['half_open']}</td>
+                        <td>{entry['ratio']*100:.1f}%</td>
                     </tr>
         """
 
@@ -241,16 +1325,76 @@ def generate_html_report(stats):
     </html>
     """
 
-    with open('analyse.html', 'w', encoding='utf-8') as f:
+    with open(output_path, 'w', encoding='utf-8') as f:
         f.write(html_content)
-    
-    webbrowser.open('file://' + os.path.realpath('analyse.html'))
+
+    if open_browser:
+        import webbrowser
+        webbrowser.open('file://' + os.path.realpath(output_path))
 
 def main():
-    file_path = 'tcp.txt'
-    stats = analyze_tcpdump(file_path)
+    parser = argparse.ArgumentParser(description="Analyse d'une capture tcpdump")
+    parser.add_argument('file_path', nargs='?', default='tcp.txt')
+    parser.add_argument('--workers', type=int, default=1,
+                        help="nombre de processus pour l'analyse parallele")
+    parser.add_argument('--columnar', action='store_true',
+                        help="charge les paquets dans une table en colonnes")
+    parser.add_argument('--window', type=float, default=DEFAULT_WINDOW,
+                        help="duree en secondes de la fenetre glissante des debits")
+    parser.add_argument('--burst-rate', type=float, default=DEFAULT_BURST_RATE,
+                        help="debit (paquets/s) au-dela duquel une source est en pic")
+    parser.add_argument('--flow-ttl', type=float, default=DEFAULT_FLOW_TTL,
+                        help="duree en secondes apres laquelle une poignee de main inachevee expire")
+    parser.add_argument('--max-flows', type=int, default=DEFAULT_MAX_FLOWS,
+                        help="nombre maximal de poignees de main suivies en memoire")
+    parser.add_argument('--approx', action='store_true',
+                        help="memoire fixe : top-K (Space-Saving) et comptages distincts (HyperLogLog) approches")
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K,
+                        help="nombre de compteurs Space-Saving en mode --approx")
+    parser.add_argument('--hll-precision', type=int, default=DEFAULT_HLL_PRECISION,
+                        help="precision HyperLogLog (2**p registres) en mode --approx")
+    parser.add_argument('--flows-csv',
+                        help="ecrit les flux termines (5-tuple bidirectionnel) dans ce fichier CSV")
+    parser.add_argument('--flow-idle', type=float, default=DEFAULT_FLOW_IDLE,
+                        help="inactivite en secondes apres laquelle un flux est termine")
+    parser.add_argument('--payload', action='store_true',
+                        help="inspecte le contenu des paquets (lignes hexadecimales de tcpdump -x/-X)")
+    parser.add_argument('--signatures',
+                        help="fichier de signatures, une par ligne (prefixe hex: pour des octets bruts)")
+    parser.add_argument('--assets',
+                        help="dossier des images du rapport, referencees par URL au lieu d'etre embarquees")
+    parser.add_argument('--image-format', choices=IMAGE_FORMATS, default='png',
+                        help="format des graphiques du rapport")
+    parser.add_argument('--follow', action='store_true',
+                        help="suit le fichier pendant que tcpdump l'ecrit")
+    parser.add_argument('--interval', type=float, default=10.0,
+                        help="periode en secondes de rafraichissement du rapport en mode --follow")
+    args = parser.parse_args()
+
+    options = {'window': args.window, 'burst_rate': args.burst_rate,
+               'flow_ttl': args.flow_ttl, 'max_flows': args.max_flows}
+    if args.approx:
+        if args.columnar:
+            parser.error("--approx et --columnar sont incompatibles")
+        options.update(approximate=True, top_k=args.top_k, hll_precision=args.hll_precision)
+    if args.flows_csv:
+        if args.columnar:
+            parser.error("--flows-csv et --columnar sont incompatibles")
+        options.update(flows_csv=args.flows_csv, flow_idle=args.flow_idle)
+    if args.payload or args.signatures:
+        if args.columnar:
+            parser.error("--payload et --columnar sont incompatibles")
+        if os.path.isfile(args.file_path) and is_pcap_file(args.file_path):
+            parser.error("--payload demande une sortie texte de tcpdump -x, pas une capture pcap")
+        options['signatures'] = load_signatures(args.signatures) if args.signatures else DEFAULT_SIGNATURES
+
+    if args.follow:
+        follow_tcpdump(args.file_path, interval=args.interval, **options)
+        return
+
+    stats = analyze_tcpdump(args.file_path, workers=args.workers, columnar=args.columnar, **options)
     if stats:
-        generate_html_report(stats)
+        generate_html_report(stats, assets_dir=args.assets, image_format=args.image_format)
     else:
         print("Erreur lors de l'analyse des données")
 
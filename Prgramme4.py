@@ -1,49 +1,38 @@
-from Programme3 import extraire_seances_r107, extraire_evenements, convertir_evenement_csv
-import matplotlib.pyplot as plt
+from Programme3 import extraire_seances_r107
+from cache_calendrier import charger_seances
+from Programme2 import Modalite
+from agregation_calendrier import agreger
+from index_calendrier import IndexCalendrier
+from charts import bar_chart, render_to_file
+import os
+
+NOMS_MOIS = {'01': 'Janvier', '02': 'Février', '03': 'Mars', '04': 'Avril', '05': 'Mai', '06': 'Juin',
+             '07': 'Juillet', '08': 'Août', '09': 'Septembre', '10': 'Octobre', '11': 'Novembre',
+             '12': 'Décembre'}
 
 def compter_seances_par_mois(seances):
-    compte_mois = {
-        '09': 0,  
-        '10': 0,  
-        '11': 0,  
-        '12': 0   
-    }
-    
-    #Tp par mois
-    for seance in seances:
-        date = seance[0]
-        mois = date.split('-')[1]
-        if seance[2] == 'TP':
-            compte_mois[mois] += 1
-    
-    return compte_mois
+    #Tp par mois, sur tous les mois ou il y en a
+    return agreger((seance for seance in seances if seance.modalite == Modalite.TP), 'mois')
 
-def creer_graphique(compte_mois):
-    mois = ['Septembre', 'Octobre', 'Novembre', 'Décembre']
-    valeurs = list(compte_mois.values())
-    
-    # graph
-    plt.figure(figsize=(10, 6))
-    plt.bar(mois, valeurs)
-    
-    plt.title('Nombre de séances de TP R1.07 par mois')
-    plt.xlabel('Mois')
-    plt.ylabel('Nombre de séances')
+def libelles_periodes(cube):
+    if cube.granularite != 'mois':
+        return cube.periodes
+    return [f"{NOMS_MOIS[periode[5:]]} {periode[:4]}" for periode in cube.periodes]
 
-    for i, v in enumerate(valeurs):
-        plt.text(i, v, str(v), ha='center', va='bottom')
+def graphique_mois(cube, titre='Nombre de séances de TP R1.07 par mois', format_image='png'):
+    # Description du graphique ; le rendu (matplotlib, backend Agg) est fait par charts
+    return bar_chart(libelles_periodes(cube), cube.total(), titre, 'Mois', 'Nombre de séances',
+                     annotate=True, image_format=format_image)
 
-    plt.savefig('seances_r107.png')#save graph
-    plt.close()
+def creer_graphique(cube, nom_fichier='seances_r107.png', titre='Nombre de séances de TP R1.07 par mois'):
+    # Image redessinee seulement si les comptes ou le titre changent (cache .chart_cache)
+    format_image = os.path.splitext(nom_fichier)[1][1:].lower() or 'png'
+    render_to_file(graphique_mois(cube, titre, format_image), nom_fichier)#save graph
 
 if __name__ == "__main__":
-    with open('ADE_RT1_Septembre2023_Decembre2023.ics', 'r', encoding='utf-8') as fichier:
-        contenu = fichier.read()
-    
-    evenements = extraire_evenements(contenu)
-    evenements_csv = [convertir_evenement_csv(evt) for evt in evenements]
+    index = IndexCalendrier(charger_seances('ADE_RT1_Septembre2023_Decembre2023.ics'))
     
     groupe_tp = "RT1-TP A1"
-    seances_r107 = extraire_seances_r107(evenements_csv, groupe_tp)
-    compte_mois = compter_seances_par_mois(seances_r107)
-    creer_graphique(compte_mois)
\ No newline at end of file
+    seances_r107 = extraire_seances_r107(index, groupe_tp)
+    cube = compter_seances_par_mois(seances_r107)
+    creer_graphique(cube)
\ No newline at end of file
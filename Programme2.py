@@ -1,100 +1,232 @@
+import re
+import sys
+from enum import IntEnum
+
+from dates_calendrier import formater_date, formater_duree, formater_heure, secondes_ics
+
+TAILLE_BLOC = 1 << 20
+
+# Sequences d'echappement des valeurs TEXT (RFC 5545, 3.3.11)
+ECHAPPEMENTS = {'\\n': '\n', '\\N': '\n', '\\,': ',', '\\;': ';', '\\\\': '\\'}
+ECHAPPEMENT = re.compile(r'\\[nN,;\\]')
+# NOM;PARAM=valeur;PARAM="valeur, avec : et ;":VALEUR
+PROPRIETE = re.compile(r'([^;:]+)((?:;[^=;:]+=(?:"[^"]*"|[^;:,"]*)(?:,(?:"[^"]*"|[^;:,"]*))*)*):(.*)', re.S)
+# Code de ressource ou de SAE en tete d'intitule : "R1.07 TD 2H", "SAE1.05 SUIVI", "R1.01b"
+CODE_COURS = re.compile(r'(R\d\.\d\d|SAE ?\d\.\d\d)')
+PARAMETRE = re.compile(r';([^=;:]+)=((?:"[^"]*"|[^;:,"]*)(?:,(?:"[^"]*"|[^;:,"]*))*)')
+
+class ProprietesEvenement(dict):
+    """Valeurs decodees d'un VEVENT, indexees par nom de propriete."""
+
+    __slots__ = ('parametres',)
+
+    def __init__(self):
+        super().__init__()
+        self.parametres = {}
+
 def lire_fichier_ics(nom_fichier):
     with open(nom_fichier, 'r', encoding='utf-8') as fichier:
         contenu = fichier.read()
     return contenu
 
-def extraire_valeur(contenu, identificateur):
-    for ligne in contenu.split('\n'):
-        if ligne.startswith(identificateur + ':'):
-            return ligne.split(':', 1)[1]
-    return "vide"
-
-def convertir_date_ics(date_ics):
-    annee = date_ics[0:4]
-    mois = date_ics[4:6]
-    jour = date_ics[6:8]
-    return f"{jour}-{mois}-{annee}"
-
-def convertir_heure_ics(heure_ics):
-    heure = heure_ics[9:11]
-    minutes = heure_ics[11:13]
-    return f"{heure}:{minutes}"
-
-def calculer_duree(debut_ics, fin_ics):
-    debut_h = int(debut_ics[9:11])
-    debut_m = int(debut_ics[11:13])
-    fin_h = int(fin_ics[9:11])
-    fin_m = int(fin_ics[11:13])
-    
-    duree_minutes = (fin_h * 60 + fin_m) - (debut_h * 60 + debut_m)
-    heures = duree_minutes // 60
-    minutes = duree_minutes % 60
-    
-    return f"{heures:02d}:{minutes:02d}"
+def deplier(texte):
+    # Une ligne qui commence par un espace ou une tabulation prolonge la precedente
+    return texte.replace('\r\n', '\n').replace('\n ', '').replace('\n\t', '')
+
+def decoder_texte(valeur):
+    if '\\' not in valeur:
+        return valeur
+    if '\\\\' in valeur:
+        return ECHAPPEMENT.sub(lambda echappement: ECHAPPEMENTS[echappement.group()], valeur)
+    # Sans barre oblique echappee, les remplacements successifs sont sans ambiguite
+    return valeur.replace('\\n', '\n').replace('\\N', '\n').replace('\\,', ',').replace('\\;', ';')
+
+def decouper_propriete(ligne):
+    nom, _, valeur = ligne.partition(':')
+    if ';' not in nom:
+        return nom.upper(), None, valeur
+    # Les parametres peuvent contenir ':' entre guillemets : on passe par la regex
+    correspondance = PROPRIETE.match(ligne)
+    if correspondance is None:
+        return None, None, None
+    nom, parametres, valeur = correspondance.groups()
+    parametres = {cle.upper(): texte.strip('"') for cle, texte in PARAMETRE.findall(parametres)}
+    return nom.upper(), parametres, valeur
+
+def retirer_composants(lignes):
+    # Ecarte les composants imbriques (VALARM...) qui redefinissent DESCRIPTION ou SUMMARY
+    gardees = []
+    profondeur = 0
+    for ligne in lignes:
+        if ligne.startswith('BEGIN:'):
+            profondeur += 1
+        elif ligne.startswith('END:') and profondeur:
+            profondeur -= 1
+        elif not profondeur:
+            gardees.append(ligne)
+    return gardees
+
+def lire_evenement(lignes):
+    evenement = ProprietesEvenement()
+    for ligne in lignes:
+        nom, _, valeur = ligne.partition(':')
+        if ';' in nom:
+            nom, parametres, valeur = decouper_propriete(ligne)
+            if nom is None:
+                continue
+            evenement.parametres[nom] = parametres
+        elif not nom:
+            continue
+        evenement[nom] = decoder_texte(valeur) if '\\' in valeur else valeur
+    return evenement
+
+def analyser_texte(texte):
+    # texte deja deplie ; chaque morceau se termine juste avant un END:VEVENT
+    for morceau in texte.split('\nEND:VEVENT'):
+        debut = morceau.find('BEGIN:VEVENT\n')
+        if debut < 0 or (debut and morceau[debut - 1] != '\n'):
+            continue
+        lignes = morceau[debut + 13:].split('\n')
+        if '\nBEGIN:' in morceau[debut + 12:]:
+            lignes = retirer_composants(lignes)
+        yield lire_evenement(lignes)
+
+def extraire_proprietes(blocs):
+    # blocs : texte entier ou blocs lus d'un fichier. Seuls les VEVENT complets
+    # d'un bloc sont analyses, la suite attend le bloc suivant
+    reste = ''
+    for bloc in blocs:
+        texte = reste + bloc
+        fin = texte.rfind('\nEND:VEVENT')
+        if fin < 0:
+            reste = texte
+            continue
+        fin += len('\nEND:VEVENT')
+        reste = texte[fin:]
+        yield from analyser_texte(deplier(texte[:fin]))
+    if reste:
+        yield from analyser_texte(deplier(reste))
+
+class Modalite(IntEnum):
+    VIDE = 0
+    CM = 1
+    TD = 2
+    TP = 3
+    DS = 4
+    PROJ = 5
+
+    @property
+    def libelle(self):
+        return LIBELLES_MODALITE[self]
+
+LIBELLES_MODALITE = {Modalite.VIDE: 'vide', Modalite.CM: 'CM', Modalite.TD: 'TD',
+                     Modalite.TP: 'TP', Modalite.DS: 'DS', Modalite.PROJ: 'Proj'}
 
 def extraire_modalite(description):
     if "CM" in description:
-        return "CM"
+        return Modalite.CM
     elif "TD" in description:
-        return "TD"
+        return Modalite.TD
     elif "TP" in description:
-        return "TP"
+        return Modalite.TP
     elif "DS" in description:
-        return "DS"
+        return Modalite.DS
     elif "Proj" in description:
-        return "Proj"
-    return "vide"
+        return Modalite.PROJ
+    return Modalite.VIDE
 
-def extraire_evenements(contenu_ics):
-    evenements = []
-    evenement_courant = []
-    dans_evenement = False
-    
-    for ligne in contenu_ics.split('\n'):
-        if ligne.startswith('BEGIN:VEVENT'):
-            dans_evenement = True
-            evenement_courant = []
-        elif ligne.startswith('END:VEVENT'):
-            dans_evenement = False
-            evenements.append('\n'.join(evenement_courant))
-        elif dans_evenement:
-            evenement_courant.append(ligne)
-            
-    return evenements
+def code_cours(intitule):
+    correspondance = CODE_COURS.match(intitule)
+    return sys.intern(correspondance.group().replace(' ', '')) if correspondance else None
 
-def convertir_evenement_csv(evenement):
-    uid = extraire_valeur(evenement, "UID")
-    dtstart = extraire_valeur(evenement, "DTSTART")
-    dtend = extraire_valeur(evenement, "DTEND")
-    summary = extraire_valeur(evenement, "SUMMARY")
-    location = extraire_valeur(evenement, "LOCATION")
-    description = extraire_valeur(evenement, "DESCRIPTION")
-    date = convertir_date_ics(dtstart)
-    heure = convertir_heure_ics(dtstart)
-    duree = calculer_duree(dtstart, dtend)
-    modalite = extraire_modalite(summary)
+def interner(valeurs, internes=None):
+    # Les memes salles, profs et groupes reviennent a chaque seance : un seul tuple par
+    # combinaison dans la table internes, propre a un chargement pour ne pas croitre sans fin
+    cle = tuple(sys.intern(valeur) for valeur in valeurs)
+    return internes.setdefault(cle, cle) if internes is not None else cle
+
+class Evenement:
+    """Seance du calendrier ; debut et fin en secondes depuis l'epoque, duree en minutes.
+
+    sequence et modifie (LAST-MODIFIED, en secondes) servent a la resynchronisation.
+    """
+
+    __slots__ = ('uid', 'debut', 'fin', 'duree', 'modalite', 'intitule', 'cours', 'salles', 'profs', 'groupes',
+                 'sequence', 'modifie')
+
+    def __init__(self, uid, debut, fin, modalite, intitule, salles, profs, groupes, cours=None,
+                 sequence=0, modifie=0):
+        self.uid = uid
+        self.debut = debut
+        self.fin = fin
+        self.duree = (fin - debut) // 60
+        self.modalite = modalite
+        self.intitule = intitule
+        self.cours = cours if cours is not None else code_cours(intitule)
+        self.salles = salles
+        self.profs = profs
+        self.groupes = groupes
+        self.sequence = sequence
+        self.modifie = modifie
+
+    def __repr__(self):
+        return f"Evenement({self.uid!r}, {formater_date(self.debut)} {formater_heure(self.debut)}, {self.intitule!r})"
+
+def convertir_evenement(proprietes, internes=None):
     groupes = []
     profs = []
-    for ligne in description.split('\n'):
+    for ligne in proprietes.get("DESCRIPTION", "").split('\n'):
+        ligne = ligne.strip()
         if "RT1-" in ligne:
-            groupes.append(ligne.strip())
-        elif len(ligne.strip()) > 0 and not ligne.startswith('('):
-            profs.append(ligne.strip())
+            groupes.append(ligne)
+        elif ligne and not ligne.startswith('('):
+            profs.append(ligne)
+    salles = [salle.strip() for salle in proprietes.get("LOCATION", "").split(',') if salle.strip()]
+    intitule = proprietes.get("SUMMARY", "vide")
+    # Heures UTC (suffixe Z) ou locales au fuseau TZID, Europe/Paris par defaut
+    parametres = proprietes.parametres
+    debut = secondes_ics(proprietes["DTSTART"], (parametres.get("DTSTART") or {}).get("TZID"))
+    if "DTEND" in proprietes:
+        fin = secondes_ics(proprietes["DTEND"], (parametres.get("DTEND") or {}).get("TZID"))
+    else:
+        fin = debut
+    sequence = proprietes.get("SEQUENCE", "0")
+    modifie = proprietes.get("LAST-MODIFIED")
+    return Evenement(proprietes.get("UID", "vide"), debut, fin, extraire_modalite(intitule), intitule,
+                     interner(salles, internes), interner(profs, internes), interner(groupes, internes),
+                     sequence=int(sequence) if sequence.isdigit() else 0,
+                     modifie=secondes_ics(modifie) if modifie else 0)
+
+def extraire_evenements(contenu_ics):
+    return list(extraire_proprietes([contenu_ics]))
 
-    groupes_str = "|".join(groupes) if groupes else "vide"
-    profs_str = "|".join(profs) if profs else "vide"
-    salles_str = location.replace(',', '|')
+def lire_evenements_ics(nom_fichier, taille_bloc=TAILLE_BLOC):
+    # Lecture par blocs : la memoire ne depend pas de la taille du calendrier
+    with open(nom_fichier, 'r', encoding='utf-8', newline='') as fichier:
+        yield from extraire_proprietes(iter(lambda: fichier.read(taille_bloc), ''))
 
-    return f"{uid};{date};{heure};{duree};{modalite};{summary};{salles_str};{profs_str};{groupes_str}"
+def lire_seances_ics(nom_fichier, taille_bloc=TAILLE_BLOC):
+    internes = {}
+    for proprietes in lire_evenements_ics(nom_fichier, taille_bloc):
+        if "DTSTART" in proprietes:
+            yield convertir_evenement(proprietes, internes)
+
+def convertir_evenement_csv(evenement):
+    # Mise en forme reservee a l'export
+    groupes_str = "|".join(evenement.groupes) if evenement.groupes else "vide"
+    profs_str = "|".join(evenement.profs) if evenement.profs else "vide"
+    salles_str = "|".join(evenement.salles) if evenement.salles else "vide"
+    return (f"{evenement.uid};{formater_date(evenement.debut)};{formater_heure(evenement.debut)};"
+            f"{formater_duree(evenement.duree)};{evenement.modalite.libelle};{evenement.intitule};"
+            f"{salles_str};{profs_str};{groupes_str}")
 
 if __name__ == "__main__":
+    from export_calendrier import ecrire_csv
+
     nom_fichier = "ADE_RT1_Septembre2023_Decembre2023.ics"
     try:
-        contenu = lire_fichier_ics(nom_fichier)
-        evenements = extraire_evenements(contenu)
-        resultats = [convertir_evenement_csv(evt) for evt in evenements]
-        for resultat in resultats:
-            print(resultat)
+        # csv met entre guillemets les champs qui contiennent ';' ou un saut de ligne
+        ecrire_csv(lire_seances_ics(nom_fichier), sys.stdout)
             
     except FileNotFoundError:
         print(f"Le fichier {nom_fichier} n'a pas été trouvé.")
@@ -1,50 +1,25 @@
-import subprocess
-import sys
+import html
+import re
+from Programme2 import Modalite, formater_date, formater_duree
+from agregation_calendrier import agreger
+from index_calendrier import IndexCalendrier
+from cache_calendrier import charger_seances
 
-# Inst markdown
-try:
-    import markdown
-except ImportError:
-    print("Installation de markdown...")
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "markdown"])
-    import markdown
+# ![texte](image) seul sur sa ligne
+IMAGE_MD = re.compile(r'!\[([^\]]*)\]\(([^)]*)\)')
 
-def extraire_seances_r107(evenements_csv, groupe_tp):
-    seances_r107 = []
-    
-    for evt in evenements_csv:
-        champs = evt.split(';')
-        intitule = champs[5]
-        groupes = champs[8]
-        
-        if "R1.07" in intitule and groupe_tp in groupes:
-            date = champs[1]
-            duree = champs[3]
-            modalite = champs[4]
-            seances_r107.append([date, duree, modalite])
-    
-    return seances_r107
+def extraire_seances_r107(index, groupe_tp):
+    # Correspondance exacte sur le code du cours et le groupe, seances triees par date ;
+    # index est un IndexCalendrier construit une fois pour toutes les recherches
+    return index.rechercher(cours="R1.07", groupe=groupe_tp)
 
 def compter_seances_par_mois(seances):
-    compte_mois = {
-        '09': 0,  
-        '10': 0,  
-        '11': 0,  
-        '12': 0   
-    }
-    
-    for seance in seances:
-        date = seance[0]  
-        mois = date.split('-')[1]
-        if seance[2] == 'TP':  
-            compte_mois[mois] += 1
-    
-    return compte_mois
+    return agreger((seance for seance in seances if seance.modalite == Modalite.TP), 'mois')
 
-def creer_markdown(seances, compte_mois):
+def creer_markdown(seances, cube, cours="R1.07", image='seances_r107.png'):
     # Contenu markdown
-    md_content = """
-# Analyse des séances R1.07
+    md_content = f"""
+# Analyse des séances {cours}
 
 ## Tableau des séances
 
@@ -53,20 +28,67 @@ def creer_markdown(seances, compte_mois):
 """
     
     for seance in seances:
-        md_content += f"| {seance[0]} | {seance[1]} | {seance[2]} |\n"
+        md_content += (f"| {formater_date(seance.debut)} | {formater_duree(seance.duree)} "
+                       f"| {seance.modalite.libelle} |\n")
     
-    # graph
+    # graph et comptes du cube
     md_content += """
 ## Répartition des séances TP par mois
 
-![Graphique des séances](seances_r107.png)
+| Mois | Séances | Durée |
+|------|---------|-------|
+"""
+    for periode, nombre, minutes in zip(cube.periodes, cube.total(), cube.total('minutes')):
+        md_content += f"| {periode} | {nombre} | {formater_duree(minutes)} |\n"
+
+    md_content += f"""
+![Graphique des séances]({image})
 """
     
     return md_content
 
-def generer_html(md_content):
+def cellules(ligne):
+    return [html.escape(cellule.strip()) for cellule in ligne.strip().strip('|').split('|')]
+
+def markdown_vers_html(md_content):
+    # Juste ce qu'utilise creer_markdown : titres #/##, tableaux | a | b |, images, paragraphes.
+    # Remplace le paquet markdown (pas d'installation, et il ne rendait pas les tableaux)
+    morceaux = []
+    lignes = md_content.strip().split('\n')
+    i = 0
+    while i < len(lignes):
+        ligne = lignes[i].strip()
+        i += 1
+        if not ligne:
+            continue
+        if ligne.startswith('#'):
+            niveau = len(ligne) - len(ligne.lstrip('#'))
+            morceaux.append(f"<h{niveau}>{html.escape(ligne[niveau:].strip())}</h{niveau}>")
+        elif ligne.startswith('|'):
+            tableau = [ligne]
+            while i < len(lignes) and lignes[i].strip().startswith('|'):
+                tableau.append(lignes[i].strip())
+                i += 1
+            # La deuxieme ligne |---|---| separe l'en-tete du corps
+            corps = tableau[2:] if len(tableau) > 1 and set(tableau[1]) <= set('|-: ') else tableau[1:]
+            morceaux.append("<table>\n<thead>\n<tr>"
+                            + "".join(f"<th>{cellule}</th>" for cellule in cellules(tableau[0]))
+                            + "</tr>\n</thead>\n<tbody>\n"
+                            + "".join("<tr>" + "".join(f"<td>{cellule}</td>" for cellule in cellules(rang))
+                                      + "</tr>\n" for rang in corps)
+                            + "</tbody>\n</table>")
+        else:
+            image = IMAGE_MD.fullmatch(ligne)
+            if image:
+                morceaux.append(f'<p><img alt="{html.escape(image.group(1))}" '
+                                f'src="{html.escape(image.group(2))}" /></p>')
+            else:
+                morceaux.append(f"<p>{html.escape(ligne)}</p>")
+    return "\n".join(morceaux)
+
+def generer_html(md_content, nom_fichier='rapport_r107.html'):
     # markdown en HTML
-    html_content = markdown.markdown(md_content)
+    html_content = markdown_vers_html(md_content)
     
     # style CSS
     html_complet = f"""
@@ -89,29 +111,23 @@ def generer_html(md_content):
 """
     
     # save fichier HTML
-    with open('rapport_r107.html', 'w', encoding='utf-8') as f:
+    with open(nom_fichier, 'w', encoding='utf-8') as f:
         f.write(html_complet)
         
 if __name__ == "__main__":
     try:
-        # fichier calendrier
-        with open('ADE_RT1_Septembre2023_Decembre2023.ics', 'r', encoding='utf-8') as fichier:
-            contenu = fichier.read()
-        
-        # prise des évènement
-        from Programme2 import extraire_evenements, convertir_evenement_csv
-        evenements = extraire_evenements(contenu)
-        evenements_csv = [convertir_evenement_csv(evt) for evt in evenements]
+        # prise des évènement, depuis le cache quand le calendrier n'a pas changé
+        index = IndexCalendrier(charger_seances('ADE_RT1_Septembre2023_Decembre2023.ics'))
         
         # prise séaces
         groupe_tp = "RT1-TP A2"
-        seances_r107 = extraire_seances_r107(evenements_csv, groupe_tp)
+        seances_r107 = extraire_seances_r107(index, groupe_tp)
         
         # séances/ mois
-        compte_mois = compter_seances_par_mois(seances_r107)
+        cube = compter_seances_par_mois(seances_r107)
         
         # contenue markdown
-        md_content = creer_markdown(seances_r107, compte_mois)
+        md_content = creer_markdown(seances_r107, cube)
         
         generer_html(md_content)
         
@@ -1,4 +1,4 @@
-from datetime import datetime
+from dates_calendrier import formater_date, formater_duree, formater_heure, secondes_ics
 
 def lire_fichier_ics(nom_fichier):
     """Lit le contenu d'un fichier .ics."""
@@ -25,20 +25,13 @@ def extraire_evenement_ics(contenu):
     return evenement
 
 def convertir_format_date(date_ics):
-    """Convertit une date AAAAMMJJThhmmssZ en JJ-MM-AAAA et HH:MM."""
-    date_obj = datetime.strptime(date_ics, "%Y%m%dT%H%M%SZ")
-    date_str = date_obj.strftime("%d-%m-%Y")
-    heure_str = date_obj.strftime("%H:%M")
-    return date_str, heure_str
+    """Convertit une date AAAAMMJJThhmmssZ (UTC) en JJ-MM-AAAA et HH:MM, heure de Paris."""
+    secondes = secondes_ics(date_ics)
+    return formater_date(secondes), formater_heure(secondes)
 
 def calculer_duree(dtstart, dtend):
-    """Calcule la durée entre DTSTART et DTEND."""
-    date_debut = datetime.strptime(dtstart, "%Y%m%dT%H%M%SZ")
-    date_fin = datetime.strptime(dtend, "%Y%m%dT%H%M%SZ")
-    duree = date_fin - date_debut
-    heures, secondes = divmod(duree.total_seconds(), 3600)
-    minutes = secondes // 60
-    return f"{int(heures):02}:{int(minutes):02}"
+    """Calcule la durée entre DTSTART et DTEND, y compris après minuit."""
+    return formater_duree((secondes_ics(dtend) - secondes_ics(dtstart)) // 60)
 
 def generer_pseudo_csv(evenement):
     """Génère une chaîne pseudo-CSV à partir des informations de l'événement."""
@@ -0,0 +1,149 @@
+from array import array
+from collections import Counter
+from datetime import date
+
+from dates_calendrier import charger_numpy, fuseau
+from index_calendrier import valeurs_dimension
+
+GRANULARITES = ('jour', 'semaine', 'mois', 'semestre')
+DIMENSIONS = ('cours', 'modalite', 'groupe', 'salle', 'prof')
+SECONDES_JOUR = 86_400
+# date.fromordinal(ORDINAL_EPOQUE) == 1970-01-01, un jeudi
+ORDINAL_EPOQUE = 719_163
+
+def jour_vers_mois(jour):
+    jour = date.fromordinal(jour + ORDINAL_EPOQUE)
+    return (jour.year - 1970) * 12 + jour.month - 1
+
+def mois_vers_semestre(mois):
+    # Annee universitaire : S1 de septembre a janvier, S2 de fevrier a aout
+    annee, rang = divmod(mois, 12)
+    if rang >= 8:
+        return annee * 2
+    if rang == 0:
+        return (annee - 1) * 2
+    return (annee - 1) * 2 + 1
+
+def codes_periodes(debuts, granularite):
+    # debuts : secondes UTC depuis l'epoque ; les periodes suivent l'heure de Paris.
+    # Renvoie un entier par seance et par periode
+    debuts = fuseau().vers_locales(debuts)
+    np = charger_numpy()
+    if np is not None:
+        jours = np.asarray(debuts, dtype=np.int64) // SECONDES_JOUR
+        if granularite == 'jour':
+            return jours
+        if granularite == 'semaine':
+            return (jours + 3) // 7
+        mois = jours.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+        if granularite == 'mois':
+            return mois
+        annee, rang = np.divmod(mois, 12)
+        return np.where(rang >= 8, annee * 2, np.where(rang == 0, (annee - 1) * 2, (annee - 1) * 2 + 1))
+
+    jours = [debut // SECONDES_JOUR for debut in debuts]
+    if granularite == 'jour':
+        return jours
+    if granularite == 'semaine':
+        return [(jour + 3) // 7 for jour in jours]
+    mois = [jour_vers_mois(jour) for jour in jours]
+    if granularite == 'mois':
+        return mois
+    return [mois_vers_semestre(valeur) for valeur in mois]
+
+def libelle_periode(code, granularite):
+    if granularite == 'jour':
+        return date.fromordinal(code + ORDINAL_EPOQUE).isoformat()
+    if granularite == 'semaine':
+        iso = date.fromordinal(code * 7 - 3 + ORDINAL_EPOQUE).isocalendar()
+        return f"{iso[0]}-W{iso[1]:02d}"
+    if granularite == 'mois':
+        return f"{1970 + code // 12}-{code % 12 + 1:02d}"
+    annee = 1970 + code // 2
+    return f"{annee}-{annee + 1} S{code % 2 + 1}"
+
+class CubeAgregation:
+    """Nombre de seances et minutes par cle de dimensions et par periode.
+
+    cles[i] est un tuple de valeurs (une par dimension) et periodes[j] le
+    libelle d'une periode ; seances[i][j] et minutes[i][j] sont les mesures
+    correspondantes. Seules les cles et periodes presentes sont gardees.
+    """
+
+    def __init__(self, granularite, dimensions, periodes, cles, seances, minutes):
+        self.granularite = granularite
+        self.dimensions = dimensions
+        self.periodes = periodes
+        self.cles = cles
+        self.seances = seances
+        self.minutes = minutes
+        self._positions = {cle: position for position, cle in enumerate(cles)}
+
+    def serie(self, cle=(), mesure='seances'):
+        position = self._positions.get(tuple(cle))
+        if position is None:
+            return [0] * len(self.periodes)
+        return getattr(self, mesure)[position]
+
+    def total(self, mesure='seances'):
+        return [sum(colonne) for colonne in zip(*getattr(self, mesure))] or [0] * len(self.periodes)
+
+    def lignes(self):
+        for cle, seances, minutes in zip(self.cles, self.seances, self.minutes):
+            for periode, nombre, duree in zip(self.periodes, seances, minutes):
+                if nombre:
+                    yield cle, periode, nombre, duree
+
+def encoder_cles(evenements, dimensions):
+    # Une ligne par seance et par combinaison de valeurs : une seance de deux
+    # groupes compte pour chacun. Chaque combinaison recoit un code entier dense.
+    combinaisons_connues = {}
+    positions, codes = array('q'), array('q')
+    for position, evenement in enumerate(evenements):
+        combinaisons = [()]
+        for dimension in dimensions:
+            combinaisons = [combinaison + (valeur,) for combinaison in combinaisons
+                            for valeur in valeurs_dimension(evenement, dimension)]
+        for combinaison in combinaisons:
+            positions.append(position)
+            codes.append(combinaisons_connues.setdefault(combinaison, len(combinaisons_connues)))
+    return positions, codes, list(combinaisons_connues)
+
+def agreger(evenements, granularite='mois', dimensions=()):
+    if granularite not in GRANULARITES:
+        raise ValueError(f"granularite inconnue : {granularite}")
+    dimensions = tuple(dimensions)
+    for dimension in dimensions:
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"dimension inconnue : {dimension}")
+    evenements = list(evenements)
+    periodes_seances = codes_periodes([evenement.debut for evenement in evenements], granularite)
+    positions, codes, combinaisons = encoder_cles(evenements, dimensions)
+
+    np = charger_numpy()
+    if np is not None:
+        positions = np.asarray(positions, dtype=np.int64)
+        codes_periode, colonnes = np.unique(np.asarray(periodes_seances)[positions], return_inverse=True)
+        codes_cle, rangs = np.unique(np.asarray(codes, dtype=np.int64), return_inverse=True)
+        cellules = rangs * len(codes_periode) + colonnes
+        taille = len(codes_cle) * len(codes_periode)
+        durees = np.fromiter((evenement.duree for evenement in evenements), np.int64, len(evenements))
+        forme = (len(codes_cle), len(codes_periode))
+        seances = np.bincount(cellules, minlength=taille).reshape(forme).tolist()
+        minutes = np.bincount(cellules, weights=durees[positions], minlength=taille)
+        minutes = minutes.astype(np.int64).reshape(forme).tolist()
+        codes_periode, codes_cle = codes_periode.tolist(), codes_cle.tolist()
+    else:
+        comptes, durees = Counter(), Counter()
+        for position, code in zip(positions, codes):
+            cellule = (code, periodes_seances[position])
+            comptes[cellule] += 1
+            durees[cellule] += evenements[position].duree
+        codes_periode = sorted({periode for _, periode in comptes})
+        codes_cle = sorted({code for code, _ in comptes})
+        seances = [[comptes[code, periode] for periode in codes_periode] for code in codes_cle]
+        minutes = [[durees[code, periode] for periode in codes_periode] for code in codes_cle]
+
+    return CubeAgregation(granularite, dimensions,
+                          [libelle_periode(code, granularite) for code in codes_periode],
+                          [combinaisons[code] for code in codes_cle], seances, minutes)
@@ -0,0 +1,230 @@
+import argparse
+import os
+import re
+import struct
+import tempfile
+import time
+import tracemalloc
+
+from Analyser_app import (READ_BUFFER_SIZE, TrafficAggregator, iter_capture_records,
+                          load_packet_table, parse_packet_line)
+from payload_scan import DEFAULT_SIGNATURES
+
+SAMPLE_FILE = 'fichier1000.txt'
+LEGACY_IP_PATTERN = r'IP (?:([0-9]+(?:\.[0-9]+){3})\.([0-9]+))? ?([0-9]+(?:\.[0-9]+){3})?'
+LEGACY_PACKET_PATTERN = re.compile(r'(\d{2}:\d{2}:\d{2}\.\d{6})\s+IP\s+(.*?)\s+>\s+(.*?):\s+(.*)')
+
+def replicate_sample(target_path, line_count, sample_path=SAMPLE_FILE):
+    with open(sample_path, 'r', encoding='utf-8') as sample:
+        lines = sample.read().splitlines(keepends=True)
+    block = ''.join(lines)
+    full_blocks, remainder = divmod(line_count, len(lines))
+    with open(target_path, 'w', encoding='utf-8') as out:
+        for _ in range(full_blocks):
+            out.write(block)
+        out.writelines(lines[:remainder])
+
+def legacy_stats(packets):
+    return {
+        'count': sum(1 for p in packets if 'Flags [S]' in p['info']),
+        'percentage': sum(1 for p in packets if 'Flags [S]' in p['info'])/len(packets)*100,
+        'suspicious': len(set(p['source'] for p in packets if 'Flags [S]' in p['info'])),
+        'suspicious_pct': len(set(p['source'] for p in packets if 'Flags [S]' in p['info']))/len(set(p['source'] for p in packets))*100,
+        'services': len(set(p['destination'].split('.')[-1] for p in packets if '.' in p['destination'])),
+        'threshold': len(packets) / len(set(p['source'] for p in packets)) * 2,
+    }
+
+def run_legacy(path):
+    packets = []
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file.readlines():
+            match = LEGACY_PACKET_PATTERN.match(line)
+            if match:
+                timestamp, src, dst, info = match.groups()
+                packets.append({'timestamp': timestamp, 'source': src, 'destination': dst, 'info': info})
+    start = time.perf_counter()
+    legacy_stats(packets)
+    return time.perf_counter() - start
+
+def run_aggregator(path):
+    aggregator = TrafficAggregator()
+    with open(path, 'r', encoding='utf-8', buffering=READ_BUFFER_SIZE) as file:
+        for line in file:
+            record = parse_packet_line(line)
+            if record is not None:
+                aggregator.add_record(record)
+    start = time.perf_counter()
+    aggregator.to_stats()
+    return time.perf_counter() - start
+
+def timed(function, *args):
+    start = time.perf_counter()
+    stats_time = function(*args)
+    return time.perf_counter() - start, stats_time
+
+def bench_aggregation(args):
+    sizes = [n for n in (10_000, 100_000, 1_000_000, 10_000_000) if n <= args.max_lines]
+    print(f"{'lignes':>10} {'legacy total':>13} {'legacy stats':>13} {'agreg total':>12} {'agreg stats':>12} {'ns/ligne':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = os.path.join(tmp, f'capture_{size}.txt')
+            replicate_sample(path, size)
+            legacy_total, legacy_stats_time = timed(run_legacy, path)
+            agg_total, agg_stats_time = timed(run_aggregator, path)
+            print(f"{size:>10} {legacy_total:>12.3f}s {legacy_stats_time:>12.3f}s "
+                  f"{agg_total:>11.3f}s {agg_stats_time:>11.4f}s {agg_total/size*1e9:>9.0f}")
+            os.remove(path)
+
+def legacy_classify(line):
+    match = LEGACY_PACKET_PATTERN.match(line)
+    if 'IP' in line:
+        parts = line.split('>')
+        if len(parts) > 1:
+            parts[1].strip().split(':')[0].strip().split('.')[-1]
+        re.search(LEGACY_IP_PATTERN, line)
+    return match
+
+def lines_per_second(classify, lines, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for line in lines:
+            classify(line)
+    return len(lines) * repeat / (time.perf_counter() - start)
+
+def bench_classifier(args):
+    with open(SAMPLE_FILE, 'r', encoding='utf-8') as sample:
+        lines = sample.readlines()
+    repeat = max(args.max_lines // len(lines), 1) if args.max_lines < 1_000_000 else 200
+    before = lines_per_second(legacy_classify, lines, repeat)
+    after = lines_per_second(parse_packet_line, lines, repeat)
+    print(f"{SAMPLE_FILE} x{repeat}")
+    print(f"avant (3 passes regex/split) : {before:>12,.0f} lignes/s")
+    print(f"apres (classifieur fusionne) : {after:>12,.0f} lignes/s  (x{after/before:.1f})")
+
+def load_legacy_packets(path):
+    packets = []
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            match = LEGACY_PACKET_PATTERN.match(line)
+            if match:
+                timestamp, src, dst, info = match.groups()
+                packets.append({'timestamp': timestamp, 'source': src, 'destination': dst, 'info': info})
+    return packets
+
+def traced_memory(function, *args):
+    tracemalloc.start()
+    result = function(*args)
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, used
+
+def bench_table(args):
+    size = min(args.max_lines, 1_000_000)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'capture.txt')
+        replicate_sample(path, size)
+        packets, dicts_bytes = traced_memory(load_legacy_packets, path)
+        table, table_bytes = traced_memory(load_packet_table, path)
+        start = time.perf_counter()
+        table.to_stats()
+        stats_time = time.perf_counter() - start
+    count = len(packets)
+    print(f"{count} paquets ({size} lignes)")
+    print(f"liste de dicts : {dicts_bytes/count:>8.1f} octets/paquet")
+    print(f"table colonnes : {table_bytes/count:>8.1f} octets/paquet (x{dicts_bytes/table_bytes:.1f})")
+    print(f"statistiques sur la table : {stats_time:.3f}s")
+
+def text_to_pcap(text_path, pcap_path):
+    # Les lignes hexadecimales de tcpdump -x contiennent le paquet IP complet :
+    # on les recopie dans un pcap LINKTYPE_RAW horodate a la date du jour
+    midnight = time.mktime(time.localtime()[:3] + (0, 0, 0, 0, 0, -1))
+    packets = 0
+    with open(text_path, 'r', encoding='utf-8') as text, open(pcap_path, 'wb') as pcap:
+        pcap.write(struct.pack('<IHHiIII', 0xa1b2c3d4, 2, 4, 0, 0, 65535, 101))
+        timestamp, payload = None, bytearray()
+
+        def flush():
+            if timestamp is not None and payload:
+                hours, minutes, seconds = timestamp.split(':')
+                whole, micro = seconds.split('.')
+                epoch = int(midnight) + int(hours) * 3600 + int(minutes) * 60 + int(whole)
+                pcap.write(struct.pack('<IIII', epoch, int(micro), len(payload), len(payload)))
+                pcap.write(payload)
+                return 1
+            return 0
+
+        for line in text:
+            if line.startswith('\t0x'):
+                payload += bytes.fromhex(line.split(':', 1)[1].split('  ')[1])
+            else:
+                packets += flush()
+                timestamp, payload = line.split(' ', 1)[0], bytearray()
+        packets += flush()
+    return packets
+
+def count_records(path):
+    return sum(1 for _ in iter_capture_records(path))
+
+def bench_pcap(args):
+    size = min(args.max_lines, 1_000_000)
+    with tempfile.TemporaryDirectory() as tmp:
+        text_path = os.path.join(tmp, 'capture.txt')
+        pcap_path = os.path.join(tmp, 'capture.pcap')
+        headers_path = os.path.join(tmp, 'headers.txt')
+        replicate_sample(text_path, size)
+        text_to_pcap(text_path, pcap_path)
+        with open(text_path, 'r', encoding='utf-8') as text, open(headers_path, 'w', encoding='utf-8') as out:
+            out.writelines(line for line in text if not line.startswith('\t'))
+        for label, path in (('texte tcpdump -x', text_path), ('texte tcpdump', headers_path),
+                            ('pcap (mmap)', pcap_path)):
+            start = time.perf_counter()
+            packets = count_records(path)
+            elapsed = time.perf_counter() - start
+            aggregated, _ = timed(run_capture, path)
+            print(f"{label:<16} {packets:>8} paquets  decodage {packets/elapsed:>10,.0f} paquets/s  "
+                  f"analyse complete {packets/aggregated:>10,.0f} paquets/s")
+
+def run_capture(path):
+    aggregator = TrafficAggregator()
+    for record in iter_capture_records(path):
+        aggregator.add_record(record)
+    aggregator.to_stats()
+
+def run_lines(path, signatures):
+    aggregator = TrafficAggregator(signatures=signatures)
+    with open(path, 'r', encoding='utf-8', buffering=READ_BUFFER_SIZE) as file:
+        aggregator.add_lines(file)
+    return aggregator.packets_count
+
+def bench_payload(args):
+    size = min(args.max_lines, 1_000_000)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'capture.txt')
+        replicate_sample(path, size)
+        start = time.perf_counter()
+        packets = run_lines(path, None)
+        headers = time.perf_counter() - start
+        start = time.perf_counter()
+        run_lines(path, DEFAULT_SIGNATURES)
+        payload = time.perf_counter() - start
+    print(f"{packets} paquets ({size} lignes), {len(DEFAULT_SIGNATURES)} signatures")
+    print(f"en-tetes seuls    : {packets/headers:>10,.0f} paquets/s")
+    print(f"avec le contenu   : {packets/payload:>10,.0f} paquets/s  (x{payload/headers:.2f} du temps)")
+
+BENCHMARKS = {
+    'aggregation': bench_aggregation,
+    'classifier': bench_classifier,
+    'table': bench_table,
+    'pcap': bench_pcap,
+    'payload': bench_payload,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de l'analyseur tcpdump")
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--max-lines', type=int, default=10_000_000)
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
+
+if __name__ == "__main__":
+    main()
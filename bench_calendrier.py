@@ -0,0 +1,227 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from Programme2 import (ProprietesEvenement, convertir_evenement, convertir_evenement_csv, extraire_evenements,
+                        extraire_proprietes, lire_fichier_ics, lire_seances_ics)
+from index_calendrier import IndexCalendrier, valeurs_dimension
+from cache_calendrier import charger_seances
+from conflits_calendrier import calculer_occupation, detecter_conflits, trier_seances
+from dates_calendrier import colonnes_dates, secondes_ics
+
+FICHIER_EXEMPLE = 'ADE_RT1_Septembre2023_Decembre2023.ics'
+
+def dupliquer_calendrier(chemin_cible, facteur, chemin_exemple=FICHIER_EXEMPLE):
+    # Recopie facteur fois les VEVENT de l'exemple dans un seul VCALENDAR,
+    # chaque copie avec ses propres groupes et UID, comme un export de
+    # plusieurs departements
+    contenu = lire_fichier_ics(chemin_exemple)
+    debut = contenu.index('BEGIN:VEVENT')
+    fin = contenu.rindex('END:VEVENT') + len('END:VEVENT\n')
+    evenements = contenu[debut:fin]
+    with open(chemin_cible, 'w', encoding='utf-8') as sortie:
+        sortie.write(contenu[:debut])
+        sortie.write(evenements)
+        for copie in range(1, facteur):
+            sortie.write(evenements.replace('RT1-', f'RT1-{copie:03d}-').replace('UID:ADE', f'UID:{copie:03d}ADE'))
+        sortie.write('END:VCALENDAR\n')
+
+def ancien_extraire_valeur(contenu, identificateur):
+    for ligne in contenu.split('\n'):
+        if ligne.startswith(identificateur + ':'):
+            return ligne.split(':', 1)[1]
+    return "vide"
+
+def ancien_extraire_evenements(contenu_ics):
+    evenements = []
+    evenement_courant = []
+    dans_evenement = False
+    for ligne in contenu_ics.split('\n'):
+        if ligne.startswith('BEGIN:VEVENT'):
+            dans_evenement = True
+            evenement_courant = []
+        elif ligne.startswith('END:VEVENT'):
+            dans_evenement = False
+            evenements.append('\n'.join(evenement_courant))
+        elif dans_evenement:
+            evenement_courant.append(ligne)
+    return evenements
+
+CHAMPS = ("UID", "DTSTART", "DTEND", "SUMMARY", "LOCATION", "DESCRIPTION")
+
+def ancienne_extraction(chemin):
+    return [[ancien_extraire_valeur(evt, nom) for nom in CHAMPS]
+            for evt in ancien_extraire_evenements(lire_fichier_ics(chemin))]
+
+def nouvelle_extraction(chemin):
+    return list(extraire_proprietes([lire_fichier_ics(chemin)]))
+
+def ancien_convertir(evenement):
+    # Six parcours complets de l'evenement, un par champ, puis la meme mise en forme
+    proprietes = ProprietesEvenement()
+    proprietes.update((nom, ancien_extraire_valeur(evenement, nom)) for nom in CHAMPS)
+    return convertir_evenement_csv(convertir_evenement(proprietes))
+
+def ancienne_lecture(chemin):
+    return [ancien_convertir(evt) for evt in ancien_extraire_evenements(lire_fichier_ics(chemin))]
+
+def nouvelle_lecture(chemin):
+    return [convertir_evenement_csv(convertir_evenement(evt)) for evt in extraire_evenements(lire_fichier_ics(chemin))]
+
+def chronometrer(fonction, *args):
+    debut = time.perf_counter()
+    resultat = fonction(*args)
+    return time.perf_counter() - debut, resultat
+
+def bench_analyse(args):
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, 'calendrier.ics')
+        dupliquer_calendrier(chemin, args.facteur)
+        taille = os.path.getsize(chemin)
+        mesures = [(etape, chronometrer(ancienne, chemin), chronometrer(nouvelle, chemin))
+                   for etape, ancienne, nouvelle in (('extraction', ancienne_extraction, nouvelle_extraction),
+                                                     ('conversion', ancienne_lecture, nouvelle_lecture))]
+    print(f"{len(mesures[0][2][1])} evenements ({taille/1e6:.1f} Mo, exemple x{args.facteur})")
+    print(f"{'':<12} {'6 parcours par champ':>22} {'analyse en une passe':>22}")
+    for etape, (avant, anciens), (apres, nouveaux) in mesures:
+        print(f"{etape:<12} {len(anciens)/avant:>13,.0f} evt/s {len(nouveaux)/apres:>16,.0f} evt/s  (x{avant/apres:.1f})")
+
+def pic_memoire(fonction, *args):
+    tracemalloc.start()
+    resultat = fonction(*args)
+    pic = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return resultat, pic
+
+def compter_ancien(chemin):
+    return sum(1 for evt in ancien_extraire_evenements(lire_fichier_ics(chemin)) if ancien_convertir(evt))
+
+def compter_flux(chemin):
+    return sum(1 for evt in lire_seances_ics(chemin) if convertir_evenement_csv(evt))
+
+def bench_memoire(args):
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, 'calendrier.ics')
+        dupliquer_calendrier(chemin, args.facteur)
+        taille = os.path.getsize(chemin)
+        anciens, avant = pic_memoire(compter_ancien, chemin)
+        nouveaux, apres = pic_memoire(compter_flux, chemin)
+    print(f"{nouveaux} evenements ({taille/1e6:.1f} Mo, exemple x{args.facteur})")
+    print(f"chaine entiere + listes : pic {avant/1e6:>8.1f} Mo")
+    print(f"lecture par blocs       : pic {apres/1e6:>8.1f} Mo")
+
+def parcours_lineaire(evenements, groupe, debut, fin):
+    # Equivalent exact du parcours de extraire_seances_r107 avant l'index
+    return [evt for evt in evenements
+            if evt.cours == "R1.07" and groupe in evt.groupes and debut <= evt.debut < fin]
+
+def bench_index(args):
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, 'calendrier.ics')
+        dupliquer_calendrier(chemin, args.facteur)
+        evenements = list(lire_seances_ics(chemin))
+    construction, index = chronometrer(IndexCalendrier, evenements)
+    debut, fin = index.debuts[0], index.debuts[-1] + 1
+    groupes = [groupe for groupe in index.valeurs('groupe') if 'TP' in groupe][:50]
+    requetes = [(groupe, debut + (fin - debut) * i // 10, fin) for i in range(10) for groupe in groupes]
+
+    lineaire, _ = chronometrer(lambda: [parcours_lineaire(evenements, *requete) for requete in requetes])
+    indexe, _ = chronometrer(lambda: [index.rechercher(cours="R1.07", groupe=groupe, debut=a, fin=b)
+                                      for groupe, a, b in requetes])
+    print(f"{len(evenements)} evenements, index construit en {construction:.3f}s")
+    print(f"{len(requetes)} requetes cours + groupe + dates")
+    print(f"parcours lineaire : {lineaire/len(requetes)*1e3:>8.3f} ms/requete")
+    print(f"index inverse     : {indexe/len(requetes)*1e3:>8.3f} ms/requete  (x{lineaire/indexe:.0f})")
+
+def conflits_par_paires(seances, dimension):
+    conflits = 0
+    for position, premier in enumerate(seances):
+        for second in seances[position + 1:]:
+            if premier.debut < second.fin and second.debut < premier.fin:
+                conflits += len(set(valeurs_dimension(premier, dimension))
+                                & set(valeurs_dimension(second, dimension)))
+    return conflits
+
+def bench_conflits(args):
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, 'calendrier.ics')
+        dupliquer_calendrier(chemin, args.facteur)
+        seances = trier_seances(lire_seances_ics(chemin))
+    balayage, conflits = chronometrer(detecter_conflits, seances, ('groupe',))
+    occupation, _ = chronometrer(calculer_occupation, seances)
+    print(f"{len(seances)} seances, {len(conflits)} conflits de groupe")
+    print(f"balayage conflits : {balayage:>8.3f}s")
+    print(f"occupation salles : {occupation:>8.3f}s")
+    echantillon = seances[:3000]
+    paires, _ = chronometrer(conflits_par_paires, echantillon, 'groupe')
+    reduit, _ = chronometrer(detecter_conflits, echantillon, ('groupe',))
+    print(f"{len(echantillon)} seances : paires {paires:.3f}s, balayage {reduit:.3f}s (x{paires/reduit:.0f})")
+
+def anciennes_dates(valeurs):
+    # Tp1 avant lot : deux strptime par seance, strftime pour la mise en forme
+    colonnes = []
+    for debut, fin in valeurs:
+        date_debut = datetime.strptime(debut, "%Y%m%dT%H%M%SZ")
+        date_fin = datetime.strptime(fin, "%Y%m%dT%H%M%SZ")
+        heures, secondes = divmod((date_fin - date_debut).total_seconds(), 3600)
+        colonnes.append((date_debut.strftime("%d-%m-%Y"), date_debut.strftime("%H:%M"),
+                         f"{int(heures):02}:{int(secondes // 60):02}"))
+    return colonnes
+
+def dates_en_colonnes(valeurs):
+    debuts = [secondes_ics(debut) for debut, _ in valeurs]
+    fins = [secondes_ics(fin) for _, fin in valeurs]
+    return colonnes_dates(debuts, fins)
+
+def bench_dates(args):
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, 'calendrier.ics')
+        dupliquer_calendrier(chemin, args.facteur)
+        analyse, proprietes = chronometrer(lambda: list(extraire_proprietes([lire_fichier_ics(chemin)])))
+    valeurs = [(evenement["DTSTART"], evenement["DTEND"]) for evenement in proprietes]
+    ancien, _ = chronometrer(anciennes_dates, valeurs)
+    unitaire, _ = chronometrer(lambda: [(secondes_ics(debut), secondes_ics(fin)) for debut, fin in valeurs])
+    colonnes, _ = chronometrer(dates_en_colonnes, valeurs)
+    print(f"{len(valeurs)} seances, analyse ICS {analyse:.3f}s")
+    print(f"strptime/strftime      : {ancien:>8.3f}s  ({ancien/analyse:.0%} de l'analyse)")
+    print(f"secondes_ics unitaire  : {unitaire:>8.3f}s  ({unitaire/analyse:.0%})")
+    print(f"+ colonnes locales     : {colonnes:>8.3f}s  ({colonnes/analyse:.0%})")
+
+def bench_cache(args):
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, 'calendrier.ics')
+        cache = os.path.join(dossier, 'cache.sqlite')
+        dupliquer_calendrier(chemin, args.facteur)
+        analyse, evenements = chronometrer(lambda: list(lire_seances_ics(chemin)))
+        premier, _ = chronometrer(charger_seances, chemin, cache)
+        suivant, _ = chronometrer(charger_seances, chemin, cache)
+        os.utime(chemin)
+        touche, _ = chronometrer(charger_seances, chemin, cache)
+    print(f"{len(evenements)} evenements (exemple x{args.facteur})")
+    print(f"analyse du .ics              : {analyse:.3f}s")
+    print(f"premier chargement (+ cache) : {premier:.3f}s")
+    print(f"depuis le cache              : {suivant:.3f}s  (x{analyse/suivant:.1f})")
+    print(f"fichier touche, meme contenu : {touche:.3f}s")
+
+BENCHMARKS = {
+    'analyse': bench_analyse,
+    'memoire': bench_memoire,
+    'index': bench_index,
+    'cache': bench_cache,
+    'conflits': bench_conflits,
+    'dates': bench_dates,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks du traitement des calendriers ADE")
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--facteur', type=int, default=100,
+                        help="nombre de copies des evenements du calendrier exemple")
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
+
+if __name__ == "__main__":
+    main()
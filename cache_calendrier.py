@@ -0,0 +1,181 @@
+import hashlib
+import os
+import sqlite3
+
+from Programme2 import Evenement, Modalite, interner, lire_seances_ics
+
+# A incrementer quand le format des seances ou leur analyse change
+VERSION_CACHE = 4
+NOM_CACHE = '.cache_calendrier.sqlite'
+SEPARATEUR = '\x1f'
+TAILLE_LECTURE = 1 << 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fichiers (
+    chemin TEXT PRIMARY KEY,
+    taille INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    empreinte TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS seances (
+    chemin TEXT NOT NULL,
+    uid TEXT NOT NULL,
+    debut INTEGER NOT NULL,
+    fin INTEGER NOT NULL,
+    modalite INTEGER NOT NULL,
+    intitule TEXT NOT NULL,
+    cours TEXT,
+    salles TEXT NOT NULL,
+    profs TEXT NOT NULL,
+    groupes TEXT NOT NULL,
+    sequence INTEGER NOT NULL,
+    modifie INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS seances_chemin ON seances (chemin);
+CREATE TABLE IF NOT EXISTS synchros (
+    chemin TEXT PRIMARY KEY,
+    empreinte TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS seances_synchro (
+    chemin TEXT NOT NULL,
+    uid TEXT NOT NULL,
+    debut INTEGER NOT NULL,
+    fin INTEGER NOT NULL,
+    modalite INTEGER NOT NULL,
+    intitule TEXT NOT NULL,
+    cours TEXT,
+    salles TEXT NOT NULL,
+    profs TEXT NOT NULL,
+    groupes TEXT NOT NULL,
+    sequence INTEGER NOT NULL,
+    modifie INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS seances_synchro_chemin ON seances_synchro (chemin);
+"""
+TABLES = ('fichiers', 'seances', 'synchros', 'seances_synchro')
+COLONNES = "uid, debut, fin, modalite, intitule, cours, salles, profs, groupes, sequence, modifie"
+
+def chemin_cache_defaut(nom_fichier):
+    return os.path.join(os.path.dirname(os.path.abspath(nom_fichier)), NOM_CACHE)
+
+def empreinte_fichier(nom_fichier):
+    empreinte = hashlib.sha256()
+    with open(nom_fichier, 'rb') as fichier:
+        for bloc in iter(lambda: fichier.read(TAILLE_LECTURE), b''):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+def joindre(valeurs):
+    return SEPARATEUR.join(valeurs)
+
+def separer(texte, deja_vus):
+    # Les memes listes de salles, profs et groupes reviennent d'une seance a l'autre :
+    # deja_vus, propre a une lecture, donne un seul tuple par texte
+    valeurs = deja_vus.get(texte)
+    if valeurs is None:
+        valeurs = deja_vus[texte] = interner(texte.split(SEPARATEUR)) if texte else ()
+    return valeurs
+
+class CacheCalendrier:
+    """Seances deja analysees, stockees dans une base SQLite.
+
+    Une entree est valide tant que la taille et la date de modification du
+    fichier sont inchangees ; sinon on compare l'empreinte SHA-256 du contenu
+    avant de se resoudre a reanalyser le calendrier.
+
+    Les tables synchros et seances_synchro gardent a part les seances de la
+    derniere synchronisation (synchro_calendrier) : charger ne les modifie pas.
+    """
+
+    def __init__(self, chemin_cache):
+        self.connexion = sqlite3.connect(chemin_cache)
+        # Un cache d'une autre version est simplement recree
+        if self.connexion.execute("PRAGMA user_version").fetchone()[0] != VERSION_CACHE:
+            self.connexion.executescript(''.join(f"DROP TABLE IF EXISTS {table};" for table in TABLES))
+            self.connexion.execute(f"PRAGMA user_version = {VERSION_CACHE}")
+        self.connexion.executescript(SCHEMA)
+
+    def close(self):
+        self.connexion.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _entree(self, chemin):
+        return self.connexion.execute(
+            "SELECT taille, mtime_ns, empreinte FROM fichiers WHERE chemin = ?", (chemin,)).fetchone()
+
+    def est_valide(self, chemin, etat):
+        entree = self._entree(chemin)
+        if entree is None:
+            return False
+        if entree[:2] == (etat.st_size, etat.st_mtime_ns):
+            return True
+        # Fichier touche ou recopie : seul le contenu compte
+        if entree[2] != empreinte_fichier(chemin):
+            return False
+        with self.connexion:
+            self.connexion.execute("UPDATE fichiers SET taille = ?, mtime_ns = ? WHERE chemin = ?",
+                                   (etat.st_size, etat.st_mtime_ns, chemin))
+        return True
+
+    def empreinte(self, chemin):
+        entree = self._entree(chemin)
+        return entree[2] if entree is not None else None
+
+    def lire(self, chemin, table='seances'):
+        lignes = self.connexion.execute(
+            f"SELECT {COLONNES} FROM {table} WHERE chemin = ? ORDER BY rowid", (chemin,))
+        deja_vus = {}
+        modalites = list(Modalite)
+        return [Evenement(uid, debut, fin, modalites[modalite], intitule, separer(salles, deja_vus),
+                          separer(profs, deja_vus), separer(groupes, deja_vus), cours, sequence, modifie)
+                for uid, debut, fin, modalite, intitule, cours, salles, profs, groupes, sequence, modifie in lignes]
+
+    def _remplacer(self, table, chemin, evenements):
+        self.connexion.execute(f"DELETE FROM {table} WHERE chemin = ?", (chemin,))
+        self.connexion.executemany(
+            f"INSERT INTO {table} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((chemin, evt.uid, evt.debut, evt.fin, int(evt.modalite), evt.intitule, evt.cours,
+              joindre(evt.salles), joindre(evt.profs), joindre(evt.groupes), evt.sequence, evt.modifie)
+             for evt in evenements))
+
+    def ecrire(self, chemin, etat, evenements):
+        with self.connexion:
+            self._remplacer('seances', chemin, evenements)
+            self.connexion.execute("INSERT OR REPLACE INTO fichiers VALUES (?, ?, ?, ?)",
+                                   (chemin, etat.st_size, etat.st_mtime_ns, empreinte_fichier(chemin)))
+
+    def empreinte_synchro(self, chemin):
+        # Empreinte du fichier lors de la derniere synchronisation, None s'il n'y en a pas eu
+        ligne = self.connexion.execute("SELECT empreinte FROM synchros WHERE chemin = ?", (chemin,)).fetchone()
+        return ligne[0] if ligne is not None else None
+
+    def lire_synchro(self, chemin):
+        return self.lire(chemin, 'seances_synchro')
+
+    def ecrire_synchro(self, chemin, empreinte, evenements):
+        with self.connexion:
+            self._remplacer('seances_synchro', chemin, evenements)
+            self.connexion.execute("INSERT OR REPLACE INTO synchros VALUES (?, ?)", (chemin, empreinte))
+
+    def charger(self, nom_fichier):
+        chemin = os.path.abspath(nom_fichier)
+        etat = os.stat(chemin)
+        if self.est_valide(chemin, etat):
+            return self.lire(chemin)
+        evenements = list(lire_seances_ics(chemin))
+        self.ecrire(chemin, etat, evenements)
+        return evenements
+
+def charger_seances(nom_fichier, chemin_cache=None):
+    # Seances du calendrier, depuis le cache quand il est a jour
+    try:
+        cache = CacheCalendrier(chemin_cache or chemin_cache_defaut(nom_fichier))
+    except sqlite3.Error:
+        return list(lire_seances_ics(nom_fichier))
+    with cache:
+        return cache.charger(nom_fichier)
@@ -0,0 +1,141 @@
+import base64
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+# A incrementer quand le rendu change a donnees egales
+RENDER_VERSION = 1
+CHART_CACHE_DIR = '.chart_cache'
+MAX_CACHED_CHARTS = 256
+IMAGE_FORMATS = ('png', 'svg')
+MIME_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+def bar_chart(labels, values, title, xlabel='', ylabel='', figsize=(10, 6), annotate=False,
+              rotate_labels=False, seaborn_style=None, palette=None, title_size=None, label_size=None,
+              image_format='png'):
+    # Description complete d'un graphique : dictionnaire JSON, donc hachable et transmissible aux workers
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"format d'image inconnu : {image_format}")
+    return {'kind': 'bar', 'labels': [str(label) for label in labels], 'values': list(values),
+            'title': title, 'xlabel': xlabel, 'ylabel': ylabel, 'figsize': list(figsize),
+            'annotate': annotate, 'rotate_labels': rotate_labels, 'seaborn_style': seaborn_style,
+            'palette': palette, 'title_size': title_size, 'label_size': label_size, 'format': image_format}
+
+def chart_key(spec):
+    payload = json.dumps([RENDER_VERSION, spec], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def render_chart(spec):
+    """Rend un graphique et renvoie les octets de l'image.
+
+    Backend Agg : aucun affichage, utilisable dans un processus du pool.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    figure = plt.figure(figsize=spec['figsize'])
+    labels, values = spec['labels'], spec['values']
+    if spec['palette']:
+        import seaborn as sns
+        sns.set_style(spec['seaborn_style'] or 'whitegrid')
+        sns.barplot(x=labels, y=values, palette=spec['palette'])
+    else:
+        plt.bar(labels, values)
+    plt.title(spec['title'], fontsize=spec['title_size'])
+    plt.xlabel(spec['xlabel'], fontsize=spec['label_size'])
+    plt.ylabel(spec['ylabel'], fontsize=spec['label_size'])
+    if spec['annotate']:
+        for position, value in enumerate(values):
+            plt.text(position, value, str(value), ha='center', va='bottom')
+    if spec['rotate_labels']:
+        plt.xticks(rotation=45, ha='right')
+        plt.tight_layout()
+
+    buffer = BytesIO()
+    plt.savefig(buffer, format=spec['format'])
+    plt.close(figure)
+    return buffer.getvalue()
+
+class ChartCache:
+    """Images rendues, nommees par le hachage des donnees du graphique.
+
+    Un graphique dont les donnees n'ont pas change n'est pas redessine ;
+    au-dela de MAX_CACHED_CHARTS fichiers, les plus anciens sont supprimes.
+    """
+
+    def __init__(self, directory=CHART_CACHE_DIR, max_charts=MAX_CACHED_CHARTS):
+        self.directory = directory
+        self.max_charts = max_charts
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, spec):
+        return os.path.join(self.directory, f"{chart_key(spec)}.{spec['format']}")
+
+    def store(self, path, image):
+        with open(path + '.tmp', 'wb') as file:
+            file.write(image)
+        os.replace(path + '.tmp', path)
+
+    def prune(self, keep):
+        entries = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                   if name.endswith(IMAGE_FORMATS)]
+        if len(entries) <= self.max_charts:
+            return
+        entries.sort(key=os.path.getmtime)
+        for path in entries[:len(entries) - self.max_charts]:
+            if path not in keep:
+                os.remove(path)
+
+    def render(self, specs, workers=None):
+        # Renvoie le chemin de chaque image ; seules les absentes du cache sont rendues,
+        # en parallele des qu'il y en a plusieurs
+        paths = [self.path(spec) for spec in specs]
+        missing = {}
+        for spec, path in zip(specs, paths):
+            if os.path.exists(path):
+                os.utime(path)
+            else:
+                missing.setdefault(path, spec)
+        if len(missing) > 1 and workers != 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                images = pool.map(render_chart, missing.values())
+                for path, image in zip(missing, images):
+                    self.store(path, image)
+        else:
+            for path, spec in missing.items():
+                self.store(path, render_chart(spec))
+        if missing:
+            self.prune(set(paths))
+        return paths
+
+def default_cache_dir(file_path):
+    # Cache a cote du fichier produit (image ou rapport HTML)
+    return os.path.join(os.path.dirname(os.path.abspath(file_path)), CHART_CACHE_DIR)
+
+def copy_if_changed(source, destination):
+    # Une image deja a jour n'est pas reecrite (date de modification inchangee)
+    if not (os.path.exists(destination) and os.path.getsize(destination) == os.path.getsize(source)
+            and read_bytes(destination) == read_bytes(source)):
+        shutil.copyfile(source, destination)
+    return destination
+
+def render_to_file(spec, file_path, cache_dir=None):
+    source = ChartCache(cache_dir or default_cache_dir(file_path)).render([spec])[0]
+    return copy_if_changed(source, file_path)
+
+def read_bytes(path):
+    with open(path, 'rb') as file:
+        return file.read()
+
+def data_uri(path):
+    extension = os.path.splitext(path)[1][1:]
+    return f"data:{MIME_TYPES[extension]};base64,{base64.b64encode(read_bytes(path)).decode()}"
+
+def relative_url(path, html_path):
+    # Chemin de l'image relatif a la page HTML, avec des '/' meme sous Windows
+    start = os.path.dirname(os.path.abspath(html_path))
+    return os.path.relpath(os.path.abspath(path), start).replace(os.sep, '/')
@@ -0,0 +1,115 @@
+import argparse
+import heapq
+from collections import Counter, namedtuple
+
+from Programme2 import formater_date, formater_heure
+from agregation_calendrier import SECONDES_JOUR, libelle_periode
+from cache_calendrier import charger_seances
+from dates_calendrier import fuseau
+from index_calendrier import valeurs_dimension
+
+DIMENSIONS_CONFLITS = ('salle', 'prof', 'groupe')
+SECONDES_SEMAINE = 7 * SECONDES_JOUR
+# Semaine de reference pour le taux d'occupation : 5 jours de 8h a 18h
+CAPACITE_SEMAINE = 5 * 10 * 60
+
+# premier commence avant (ou en meme temps que) second et se termine apres son debut
+Conflit = namedtuple('Conflit', ['dimension', 'valeur', 'premier', 'second'])
+Occupation = namedtuple('Occupation', ['salle', 'semaine', 'minutes', 'taux'])
+
+def trier_seances(evenements):
+    # Un seul tri pour toutes les ressources : chaque sous-suite reste triee
+    return sorted((evenement for evenement in evenements if evenement.fin > evenement.debut),
+                  key=lambda evenement: (evenement.debut, evenement.fin))
+
+def detecter_conflits(seances, dimensions=DIMENSIONS_CONFLITS):
+    """Doubles reservations par salle, prof et groupe ; seances triees par trier_seances.
+
+    Balayage par ressource : un tas des fins des seances en cours. A chaque
+    debut on retire les seances terminees, celles qui restent chevauchent la
+    nouvelle. O(n log n + k) pour k conflits, au lieu de comparer les paires.
+    """
+    conflits = []
+    for dimension in dimensions:
+        en_cours = {}
+        for position, seance in enumerate(seances):
+            for valeur in valeurs_dimension(seance, dimension):
+                tas = en_cours.get(valeur)
+                if tas is None:
+                    tas = en_cours[valeur] = []
+                while tas and tas[0][0] <= seance.debut:
+                    heapq.heappop(tas)
+                for _, autre in tas:
+                    conflits.append(Conflit(dimension, valeur, seances[autre], seance))
+                heapq.heappush(tas, (seance.fin, position))
+    return conflits
+
+def semaine(secondes):
+    # Meme numerotation que agregation_calendrier : semaines du lundi depuis l'epoque
+    return (secondes // SECONDES_JOUR + 3) // 7
+
+def repartir_par_semaine(minutes, debut, fin):
+    # Un creneau a cheval sur deux semaines compte pour chacune ; semaines en heure locale
+    local = fuseau().vers_local(debut)
+    debut, fin = local, local + fin - debut
+    while debut < fin:
+        code = semaine(debut)
+        limite = min(fin, (code * 7 - 3) * SECONDES_JOUR + SECONDES_SEMAINE)
+        minutes[code] += (limite - debut) // 60
+        debut = limite
+
+def calculer_occupation(seances, capacite_semaine=CAPACITE_SEMAINE):
+    """Taux d'occupation de chaque salle par semaine, seances triees par trier_seances.
+
+    Les creneaux qui se chevauchent sont fusionnes au fil du balayage : une
+    double reservation n'occupe la salle qu'une fois.
+    """
+    creneaux = {}
+    minutes = {}
+    for seance in seances:
+        for salle in seance.salles:
+            creneau = creneaux.get(salle)
+            if creneau is None:
+                creneaux[salle] = [seance.debut, seance.fin]
+                minutes[salle] = Counter()
+            elif seance.debut > creneau[1]:
+                repartir_par_semaine(minutes[salle], *creneau)
+                creneau[0], creneau[1] = seance.debut, seance.fin
+            elif seance.fin > creneau[1]:
+                creneau[1] = seance.fin
+    for salle, creneau in creneaux.items():
+        repartir_par_semaine(minutes[salle], *creneau)
+
+    return [Occupation(salle, libelle_periode(code, 'semaine'), total,
+                       round(100 * total / capacite_semaine, 1))
+            for salle in sorted(minutes) for code, total in sorted(minutes[salle].items())]
+
+def decrire_seance(seance):
+    return f"{formater_date(seance.debut)} {formater_heure(seance.debut)} {seance.intitule}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Doubles reservations et occupation des salles")
+    parser.add_argument('fichier', nargs='?', default='ADE_RT1_Septembre2023_Decembre2023.ics')
+    parser.add_argument('--max', type=int, default=20, help="nombre de conflits affiches par dimension")
+    parser.add_argument('--capacite', type=int, default=CAPACITE_SEMAINE,
+                        help="minutes disponibles par salle et par semaine")
+    parser.add_argument('--occupation', action='store_true', help="affiche le taux d'occupation par salle et semaine")
+    args = parser.parse_args()
+
+    seances = trier_seances(charger_seances(args.fichier))
+    conflits = detecter_conflits(seances)
+    affiches = Counter()
+    for conflit in conflits:
+        affiches[conflit.dimension] += 1
+        if affiches[conflit.dimension] <= args.max:
+            print(f"[{conflit.dimension}] {conflit.valeur} : {decrire_seance(conflit.premier)} / "
+                  f"{decrire_seance(conflit.second)}")
+    for dimension in DIMENSIONS_CONFLITS:
+        print(f"{affiches[dimension]} conflits de {dimension}")
+
+    if args.occupation:
+        for ligne in calculer_occupation(seances, args.capacite):
+            print(f"{ligne.salle};{ligne.semaine};{ligne.minutes};{ligne.taux}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import calendar
+import time
+from bisect import bisect_right
+from datetime import datetime
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+FUSEAU = 'Europe/Paris'
+SECONDES_JOUR = 86_400
+
+@lru_cache(maxsize=None)
+def charger_numpy():
+    # numpy est optionnel et n'est importe qu'au premier traitement par lots
+    # (colonnes du calendrier, mode --columnar d'Analyser_app)
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+class Fuseau:
+    """Decalages UTC d'un fuseau horaire, tabules par annee.
+
+    instants[i] est l'instant UTC (en secondes) a partir duquel decalages[i]
+    s'applique. zoneinfo n'est interroge qu'a la construction de la table,
+    ensuite une conversion est une dichotomie (searchsorted avec numpy).
+    """
+
+    def __init__(self, nom=FUSEAU):
+        self.zone = ZoneInfo(nom)
+        self.debut = self.fin = 0
+        self.instants, self.decalages = [], []
+
+    def decalage_exact(self, secondes):
+        return int(datetime.fromtimestamp(secondes, self.zone).utcoffset().total_seconds())
+
+    def couvrir(self, premier, dernier):
+        # Etend la table aux instants UTC [premier, dernier], par annees entieres
+        if self.instants and self.debut <= premier and dernier < self.fin:
+            return
+        if self.instants:
+            premier, dernier = min(premier, self.debut), max(dernier, self.fin - 1)
+        self.debut = calendar.timegm((time.gmtime(premier).tm_year, 1, 1, 0, 0, 0))
+        self.fin = calendar.timegm((time.gmtime(dernier).tm_year + 1, 1, 1, 0, 0, 0))
+        instants, decalages = [self.debut], [self.decalage_exact(self.debut)]
+        # Un changement d'heure par jour au plus : on le situe a la seconde par dichotomie
+        for jour in range(self.debut + SECONDES_JOUR, self.fin + SECONDES_JOUR, SECONDES_JOUR):
+            jour = min(jour, self.fin - 1)
+            decalage = self.decalage_exact(jour)
+            if decalage == decalages[-1]:
+                continue
+            bas, haut = jour - SECONDES_JOUR, jour
+            while haut - bas > 1:
+                milieu = (bas + haut) // 2
+                if self.decalage_exact(milieu) == decalage:
+                    haut = milieu
+                else:
+                    bas = milieu
+            instants.append(haut)
+            decalages.append(decalage)
+        self.instants, self.decalages = instants, decalages
+
+    def decalage(self, secondes):
+        if not self.debut <= secondes < self.fin:
+            self.couvrir(secondes, secondes)
+        return self.decalages[bisect_right(self.instants, secondes) - 1]
+
+    def vers_local(self, secondes):
+        return secondes + self.decalage(secondes)
+
+    def vers_utc(self, locales):
+        # Heure locale -> UTC comme datetime (fold=0) : l'heure repetee en octobre prend le
+        # premier instant, l'heure sautee en mars garde le decalage d'avant le changement
+        avant = self.decalage(locales - SECONDES_JOUR)
+        if self.decalage(locales - avant) == avant:
+            return locales - avant
+        apres = self.decalage(locales + SECONDES_JOUR)
+        if self.decalage(locales - apres) == apres:
+            return locales - apres
+        return locales - avant
+
+    def vers_locales(self, secondes):
+        # Conversion en lot : liste ou tableau numpy de secondes UTC
+        if len(secondes) == 0:
+            return secondes
+        np = charger_numpy()
+        if np is not None:
+            secondes = np.asarray(secondes, dtype=np.int64)
+            self.couvrir(int(secondes.min()), int(secondes.max()))
+            rangs = np.searchsorted(np.asarray(self.instants, dtype=np.int64), secondes, 'right') - 1
+            return secondes + np.asarray(self.decalages, dtype=np.int64)[rangs]
+        self.couvrir(min(secondes), max(secondes))
+        instants, decalages = self.instants, self.decalages
+        return [valeur + decalages[bisect_right(instants, valeur) - 1] for valeur in secondes]
+
+@lru_cache(maxsize=None)
+def fuseau(nom=None):
+    return Fuseau(nom or FUSEAU)
+
+@lru_cache(maxsize=4096)
+def jour_ics(texte):
+    # AAAAMMJJ -> secondes a minuit UTC ; un calendrier n'a que quelques centaines de jours distincts
+    return calendar.timegm((int(texte[0:4]), int(texte[4:6]), int(texte[6:8]), 0, 0, 0))
+
+@lru_cache(maxsize=1 << 16)
+def secondes_ics(valeur, nom_fuseau=None):
+    # AAAAMMJJThhmmssZ (UTC), AAAAMMJJThhmmss (heure locale du fuseau) ou AAAAMMJJ.
+    # Les seances d'un calendrier reprennent les memes creneaux : une conversion par valeur distincte
+    secondes = jour_ics(valeur[:8])
+    if len(valeur) >= 15:
+        secondes += int(valeur[9:11]) * 3600 + int(valeur[11:13]) * 60 + int(valeur[13:15])
+    if valeur[-1:] == 'Z':
+        return secondes
+    return fuseau(nom_fuseau).vers_utc(secondes)
+
+@lru_cache(maxsize=4096)
+def libelle_jour(jour):
+    date = time.gmtime(jour * SECONDES_JOUR)
+    return f"{date.tm_mday:02d}-{date.tm_mon:02d}-{date.tm_year}"
+
+@lru_cache(maxsize=None)
+def libelle_minute(minute):
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+def formater_date(secondes, nom_fuseau=None):
+    return libelle_jour(fuseau(nom_fuseau).vers_local(secondes) // SECONDES_JOUR)
+
+def formater_heure(secondes, nom_fuseau=None):
+    return libelle_minute(fuseau(nom_fuseau).vers_local(secondes) % SECONDES_JOUR // 60)
+
+@lru_cache(maxsize=4096)
+def formater_duree(minutes):
+    heures, minutes = divmod(minutes, 60)
+    return f"{heures:02d}:{minutes:02d}"
+
+def libelles(codes, libelle):
+    # Une mise en forme par valeur distincte, recopiee ensuite sur toutes les seances
+    np = charger_numpy()
+    if np is not None:
+        valeurs, rangs = np.unique(codes, return_inverse=True)
+        return np.array([libelle(valeur) for valeur in valeurs.tolist()], dtype=object)[rangs].tolist()
+    return list(map(libelle, codes))
+
+def colonnes_dates(debuts, fins, nom_fuseau=None):
+    # Colonnes date, heure (locales) et duree d'un lot de seances, pour les exports
+    if len(debuts) == 0:
+        return [], [], []
+    locales = fuseau(nom_fuseau).vers_locales(debuts)
+    np = charger_numpy()
+    if np is not None:
+        minutes = (np.asarray(fins, dtype=np.int64) - np.asarray(debuts, dtype=np.int64)) // 60
+        return (libelles(locales // SECONDES_JOUR, libelle_jour),
+                libelles(locales % SECONDES_JOUR // 60, libelle_minute),
+                libelles(minutes, formater_duree))
+    return (libelles([valeur // SECONDES_JOUR for valeur in locales], libelle_jour),
+            libelles([valeur % SECONDES_JOUR // 60 for valeur in locales], libelle_minute),
+            libelles([(fin - debut) // 60 for debut, fin in zip(debuts, fins)], formater_duree))
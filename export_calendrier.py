@@ -0,0 +1,185 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from array import array
+from itertools import islice
+
+from Programme2 import Evenement, Modalite, interner, lire_seances_ics
+from dates_calendrier import charger_numpy, colonnes_dates
+
+ENTETE_CSV = ['uid', 'date', 'heure', 'duree', 'modalite', 'intitule', 'salles', 'profs', 'groupes']
+TAILLE_LOT = 10_000
+TAILLE_TAMPON = 1 << 20
+
+VERSION_COLONNES = 1
+NOM_SCHEMA = 'schema.json'
+# Colonnes numeriques : code du module array ; fichiers bruts petit-boutistes
+NUMERIQUES = {'debut': 'q', 'fin': 'q', 'duree': 'i', 'modalite': 'b', 'sequence': 'q', 'modifie': 'q'}
+TYPES_NUMPY = {'q': '<i8', 'i': '<i4', 'b': 'i1'}
+# Chaines repetees : codes entiers et dictionnaire des valeurs dans le schema
+DICTIONNAIRES = ('intitule', 'cours')
+LISTES = ('salles', 'profs', 'groupes')
+
+def lots(evenements, taille=TAILLE_LOT):
+    evenements = iter(evenements)
+    return iter(lambda: list(islice(evenements, taille)), [])
+
+def ecrire_csv(evenements, fichier, entete=True):
+    """Seances en CSV ';' dans un fichier texte ouvert avec newline=''.
+
+    Le module csv met entre guillemets les champs qui contiennent ';', '"' ou
+    un saut de ligne. Les dates sont mises en forme par lots.
+    """
+    ecrivain = csv.writer(fichier, delimiter=';', lineterminator='\n')
+    if entete:
+        ecrivain.writerow(ENTETE_CSV)
+    lignes = 0
+    for lot in lots(evenements):
+        dates, heures, durees = colonnes_dates([evenement.debut for evenement in lot],
+                                               [evenement.fin for evenement in lot])
+        ecrivain.writerows(
+            (evenement.uid, date, heure, duree, evenement.modalite.libelle, evenement.intitule,
+             '|'.join(evenement.salles) or 'vide', '|'.join(evenement.profs) or 'vide',
+             '|'.join(evenement.groupes) or 'vide')
+            for evenement, date, heure, duree in zip(lot, dates, heures, durees))
+        lignes += len(lot)
+    return lignes
+
+def exporter_csv(evenements, chemin):
+    with open(chemin, 'w', encoding='utf-8', newline='', buffering=TAILLE_TAMPON) as fichier:
+        return ecrire_csv(evenements, fichier)
+
+def ecrire_tableau(chemin, valeurs):
+    if sys.byteorder == 'big':
+        valeurs = array(valeurs.typecode, valeurs)
+        valeurs.byteswap()
+    with open(chemin, 'wb') as fichier:
+        valeurs.tofile(fichier)
+
+def exporter_colonnes(evenements, dossier):
+    """Seances en colonnes binaires, un fichier par colonne, decrites par schema.json.
+
+    Colonnes numeriques : entiers bruts (debut.bin, ...). Chaines repetees :
+    codes entiers et dictionnaire dans le schema. Listes (salles, ...) :
+    positions de debut de chaque seance et codes, comme une liste Arrow.
+    uid : octets UTF-8 concatenes et positions.
+    """
+    os.makedirs(dossier, exist_ok=True)
+    numeriques = {nom: array(code) for nom, code in NUMERIQUES.items()}
+    dictionnaires = {nom: {} for nom in DICTIONNAIRES + LISTES}
+    codes = {nom: array('i') for nom in DICTIONNAIRES + LISTES}
+    positions = {nom: array('q', [0]) for nom in LISTES + ('uid',)}
+    uids = bytearray()
+
+    for evenement in evenements:
+        for nom, colonne in numeriques.items():
+            colonne.append(getattr(evenement, nom))
+        for nom in DICTIONNAIRES:
+            valeurs = dictionnaires[nom]
+            codes[nom].append(valeurs.setdefault(getattr(evenement, nom), len(valeurs)))
+        for nom in LISTES:
+            valeurs, colonne = dictionnaires[nom], codes[nom]
+            for valeur in getattr(evenement, nom):
+                colonne.append(valeurs.setdefault(valeur, len(valeurs)))
+            positions[nom].append(len(colonne))
+        uids += evenement.uid.encode('utf-8')
+        positions['uid'].append(len(uids))
+
+    schema = {'version': VERSION_COLONNES, 'lignes': len(positions['uid']) - 1, 'colonnes': {}}
+    for nom, colonne in numeriques.items():
+        ecrire_tableau(os.path.join(dossier, f"{nom}.bin"), colonne)
+        schema['colonnes'][nom] = {'type': colonne.typecode}
+    for nom in DICTIONNAIRES + LISTES:
+        ecrire_tableau(os.path.join(dossier, f"{nom}.codes"), codes[nom])
+        schema['colonnes'][nom] = {'type': 'liste' if nom in LISTES else 'dictionnaire',
+                                   'valeurs': list(dictionnaires[nom])}
+    for nom in LISTES + ('uid',):
+        ecrire_tableau(os.path.join(dossier, f"{nom}.positions"), positions[nom])
+    with open(os.path.join(dossier, 'uid.utf8'), 'wb') as fichier:
+        fichier.write(uids)
+    schema['colonnes']['uid'] = {'type': 'texte'}
+    with open(os.path.join(dossier, NOM_SCHEMA), 'w', encoding='utf-8') as fichier:
+        json.dump(schema, fichier, ensure_ascii=False)
+    return schema['lignes']
+
+def lire_schema(dossier):
+    with open(os.path.join(dossier, NOM_SCHEMA), 'r', encoding='utf-8') as fichier:
+        schema = json.load(fichier)
+    if schema.get('version') != VERSION_COLONNES:
+        raise ValueError(f"version de colonnes non geree : {schema.get('version')}")
+    return schema
+
+def lire_tableau(chemin, code):
+    # Projection en memoire avec numpy : seules les pages lues sont chargees
+    np = charger_numpy()
+    if np is not None:
+        if os.path.getsize(chemin) == 0:
+            return np.zeros(0, dtype=TYPES_NUMPY[code])
+        return np.memmap(chemin, dtype=TYPES_NUMPY[code], mode='r')
+    valeurs = array(code)
+    with open(chemin, 'rb') as fichier:
+        valeurs.frombytes(fichier.read())
+    if sys.byteorder == 'big':
+        valeurs.byteswap()
+    return valeurs
+
+def lire_colonne(dossier, nom, schema=None):
+    """Une seule colonne, sans lire les autres ni analyser de texte.
+
+    Colonnes numeriques : tableau numpy (memmap) ou array ; dictionnaire :
+    liste de chaines ; liste : liste de tuples ; uid : liste de chaines.
+    """
+    schema = schema or lire_schema(dossier)
+    description = schema['colonnes'][nom]
+    type_colonne = description['type']
+    if type_colonne in TYPES_NUMPY:
+        return lire_tableau(os.path.join(dossier, f"{nom}.bin"), type_colonne)
+    if type_colonne == 'texte':
+        bornes = lire_tableau(os.path.join(dossier, f"{nom}.positions"), 'q').tolist()
+        with open(os.path.join(dossier, f"{nom}.utf8"), 'rb') as fichier:
+            donnees = fichier.read()
+        return [donnees[debut:fin].decode('utf-8') for debut, fin in zip(bornes, bornes[1:])]
+    valeurs = description['valeurs']
+    codes = lire_tableau(os.path.join(dossier, f"{nom}.codes"), 'i').tolist()
+    if type_colonne == 'dictionnaire':
+        return [valeurs[code] for code in codes]
+    bornes = lire_tableau(os.path.join(dossier, f"{nom}.positions"), 'q').tolist()
+    internes = {}
+    return [interner((valeurs[code] for code in codes[debut:fin]), internes)
+            for debut, fin in zip(bornes, bornes[1:])]
+
+def lire_seances_colonnes(dossier):
+    schema = lire_schema(dossier)
+    colonnes = {nom: lire_colonne(dossier, nom, schema) for nom in schema['colonnes']}
+    for nom in NUMERIQUES:
+        colonnes[nom] = colonnes[nom].tolist()
+    modalites = list(Modalite)
+    return [Evenement(uid, debut, fin, modalites[modalite], intitule, salles, profs, groupes, cours,
+                      sequence, modifie)
+            for uid, debut, fin, modalite, intitule, cours, salles, profs, groupes, sequence, modifie
+            in zip(colonnes['uid'], colonnes['debut'], colonnes['fin'], colonnes['modalite'],
+                   colonnes['intitule'], colonnes['cours'], colonnes['salles'], colonnes['profs'],
+                   colonnes['groupes'], colonnes['sequence'], colonnes['modifie'])]
+
+def main():
+    parser = argparse.ArgumentParser(description="Export des seances d'un calendrier ADE")
+    parser.add_argument('fichier', nargs='?', default='ADE_RT1_Septembre2023_Decembre2023.ics')
+    parser.add_argument('--csv', default='-', help="fichier CSV ('-' : sortie standard)")
+    parser.add_argument('--colonnes', help="dossier de l'export en colonnes binaires")
+    args = parser.parse_args()
+
+    evenements = lire_seances_ics(args.fichier)
+    if args.colonnes:
+        evenements = list(evenements)
+        lignes = exporter_colonnes(evenements, args.colonnes)
+        print(f"{lignes} seances exportees en colonnes dans {args.colonnes}", file=sys.stderr)
+    if args.csv == '-':
+        ecrire_csv(evenements, sys.stdout)
+    else:
+        lignes = exporter_csv(evenements, args.csv)
+        print(f"{lignes} seances exportees dans {args.csv}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
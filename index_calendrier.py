@@ -0,0 +1,84 @@
+from array import array
+from bisect import bisect_left
+
+DIMENSIONS = ('cours', 'groupe', 'salle', 'prof')
+
+def valeurs_dimension(evenement, dimension):
+    if dimension == 'cours':
+        return (evenement.cours,) if evenement.cours else ()
+    if dimension == 'modalite':
+        return (evenement.modalite,)
+    if dimension == 'groupe':
+        return evenement.groupes
+    if dimension == 'salle':
+        return evenement.salles
+    return evenement.profs
+
+def intersecter(courte, longue):
+    # Les deux listes sont triees : la borne basse de la dichotomie ne fait qu'avancer
+    resultat = []
+    indice, taille = 0, len(longue)
+    for position in courte:
+        indice = bisect_left(longue, position, indice)
+        if indice == taille:
+            break
+        if longue[indice] == position:
+            resultat.append(position)
+    return resultat
+
+class IndexCalendrier:
+    """Index inverse des seances, construit une fois.
+
+    Les seances sont numerotees dans l'ordre de leur debut : chaque liste de
+    postings (positions triees) correspond a une valeur exacte d'une
+    dimension, et un intervalle de dates est une plage contigue de positions.
+    """
+
+    def __init__(self, evenements):
+        self.evenements = sorted(evenements, key=lambda evenement: evenement.debut)
+        self.debuts = array('q', (evenement.debut for evenement in self.evenements))
+        self.postings = {dimension: {} for dimension in DIMENSIONS}
+        for dimension, index in self.postings.items():
+            for position, evenement in enumerate(self.evenements):
+                for valeur in valeurs_dimension(evenement, dimension):
+                    postings = index.get(valeur)
+                    if postings is None:
+                        postings = index[valeur] = array('I')
+                    postings.append(position)
+
+    def __len__(self):
+        return len(self.evenements)
+
+    def valeurs(self, dimension):
+        return sorted(self.postings[dimension])
+
+    def positions(self, debut=None, fin=None, **criteres):
+        # debut inclus, fin exclue, en secondes depuis l'epoque
+        premier = 0 if debut is None else bisect_left(self.debuts, debut)
+        dernier = len(self.debuts) if fin is None else bisect_left(self.debuts, fin)
+        listes = []
+        for dimension, valeur in criteres.items():
+            if valeur is None:
+                continue
+            postings = self.postings[dimension].get(valeur)
+            if postings is None:
+                return []
+            listes.append(postings)
+        if not listes:
+            return list(range(premier, dernier))
+
+        # On part de la liste la plus courte, restreinte a la plage de dates,
+        # et on cherche chaque position dans les autres par dichotomie
+        listes.sort(key=len)
+        plus_courte = listes[0]
+        resultat = plus_courte[bisect_left(plus_courte, premier):bisect_left(plus_courte, dernier)].tolist()
+        for autre in listes[1:]:
+            if not resultat:
+                break
+            resultat = intersecter(resultat, autre)
+        return resultat
+
+    def rechercher(self, cours=None, groupe=None, salle=None, prof=None, debut=None, fin=None):
+        evenements = self.evenements
+        return [evenements[position] for position in
+                self.positions(debut, fin, cours=cours, groupe=groupe, salle=salle, prof=prof)]
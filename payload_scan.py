@@ -0,0 +1,93 @@
+import re
+from collections import deque
+
+DEFAULT_SIGNATURES = [
+    b'/etc/passwd', b'/etc/shadow', b'cmd.exe', b'/bin/sh', b'../../',
+    b'UNION SELECT', b'<script', b'wget http', b'curl http', b'\x90\x90\x90\x90\x90\x90\x90\x90',
+]
+
+def load_signatures(path):
+    # Une signature par ligne ; "hex:" pour des octets bruts, "#" pour un commentaire
+    signatures = []
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            line = line.rstrip('\n')
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('hex:'):
+                signatures.append(bytes.fromhex(line[4:]))
+            else:
+                signatures.append(line.encode('utf-8'))
+    return signatures
+
+def signature_label(signature):
+    if signature.isascii() and signature.decode('ascii').isprintable():
+        return signature.decode('ascii')
+    return 'hex:' + signature.hex()
+
+def transport_payload(packet):
+    # packet commence a l'en-tete IPv4 (tcpdump -x / -X)
+    view = memoryview(packet)
+    if len(view) < 20 or view[0] >> 4 != 4:
+        return view[:0]
+    offset = (view[0] & 0x0f) * 4
+    if view[9] == 6 and len(view) >= offset + 13:
+        offset += (view[offset + 12] >> 4) * 4
+    elif view[9] == 17:
+        offset += 8
+    return view[offset:]
+
+class SignatureMatcher:
+    """Aho-Corasick automaton over a fixed signature set, built once.
+
+    Most payloads contain no signature at all: a compiled alternation of the
+    signatures rejects them in C, and the automaton only walks the payload from
+    the first candidate position to report every (possibly overlapping) hit.
+    """
+
+    def __init__(self, signatures):
+        self.signatures = [bytes(signature) for signature in signatures if signature]
+        self.prefilter = re.compile(b'|'.join(re.escape(signature) for signature in
+                                              sorted(self.signatures, key=len, reverse=True)))
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [[]]
+        for index, signature in enumerate(self.signatures):
+            state = 0
+            for byte in signature:
+                following = self.goto[state].get(byte)
+                if following is None:
+                    following = len(self.goto)
+                    self.goto[state][byte] = following
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.outputs.append([])
+                state = following
+            self.outputs[state].append(index)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for byte, following in self.goto[state].items():
+                queue.append(following)
+                fallback = self.fail[state]
+                while fallback and byte not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[following] = self.goto[fallback].get(byte, 0)
+                self.outputs[following] = self.outputs[following] + self.outputs[self.fail[following]]
+
+    def scan(self, payload):
+        first = self.prefilter.search(payload)
+        if first is None:
+            return []
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        hits = []
+        state = 0
+        data = payload[first.start():]
+        for position, byte in enumerate(data):
+            while state and byte not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(byte, 0)
+            for index in outputs[state]:
+                hits.append((first.start() + position - len(self.signatures[index]) + 1, self.signatures[index]))
+        return hits
@@ -0,0 +1,188 @@
+import mmap
+import struct
+import time
+
+PCAP_MAGIC = {
+    b'\xd4\xc3\xb2\xa1': ('<', 1_000_000),
+    b'\xa1\xb2\xc3\xd4': ('>', 1_000_000),
+    b'\x4d\x3c\xb2\xa1': ('<', 1_000_000_000),
+    b'\xa1\xb2\x3c\x4d': ('>', 1_000_000_000),
+}
+PCAPNG_MAGIC = b'\x0a\x0d\x0d\x0a'
+
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = (101, 12, 14, 228)
+LINKTYPE_LINUX_SLL = 113
+
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_VLAN = (0x8100, 0x88a8)
+IPPROTO_TCP, IPPROTO_UDP = 6, 17
+
+# Ordre d'affichage des drapeaux par tcpdump
+TCP_FLAG_LETTERS = ((0x01, 'F'), (0x02, 'S'), (0x04, 'R'), (0x08, 'P'),
+                    (0x10, '.'), (0x20, 'U'), (0x40, 'E'), (0x80, 'W'))
+TCP_FLAGS = [''.join(letter for bit, letter in TCP_FLAG_LETTERS if value & bit) or 'none'
+             for value in range(256)]
+
+def is_pcap_file(file_path):
+    with open(file_path, 'rb') as file:
+        magic = file.read(4)
+    return magic in PCAP_MAGIC or magic == PCAPNG_MAGIC
+
+def _ip_offset(data, offset, linktype):
+    # Renvoie la position de l'en-tete IPv4 dans la trame, ou -1
+    if linktype == LINKTYPE_ETHERNET:
+        ethertype_at = offset + 12
+        ethertype = struct.unpack_from('>H', data, ethertype_at)[0]
+        while ethertype in ETHERTYPE_VLAN:
+            ethertype_at += 4
+            ethertype = struct.unpack_from('>H', data, ethertype_at)[0]
+        return ethertype_at + 2 if ethertype == ETHERTYPE_IPV4 else -1
+    if linktype == LINKTYPE_LINUX_SLL:
+        return offset + 16 if struct.unpack_from('>H', data, offset + 14)[0] == ETHERTYPE_IPV4 else -1
+    if linktype in LINKTYPE_RAW:
+        return offset if data[offset] >> 4 == 4 else -1
+    return -1
+
+class _Clock:
+    """Formats epoch timestamps like tcpdump (local HH:MM:SS.ffffff)."""
+
+    def __init__(self):
+        self.second = None
+        self.prefix = ''
+
+    def format(self, seconds, micro):
+        if seconds != self.second:
+            self.second = seconds
+            self.prefix = time.strftime('%H:%M:%S', time.localtime(seconds))
+        return f"{self.prefix}.{micro:06d}"
+
+IPV4_HEADER = struct.Struct('>BxH5xB2x4s4s')
+TCP_HEADER = struct.Struct('>HHIIHH')
+UDP_HEADER = struct.Struct('>HHH')
+
+class _Names:
+    """Caches the text form of addresses and ports, which repeat a lot."""
+
+    def __init__(self):
+        self.addresses = {}
+        self.ports = {}
+
+    def address(self, raw):
+        name = self.addresses.get(raw)
+        if name is None:
+            name = self.addresses[raw] = '.'.join(map(str, raw))
+        return name
+
+    def port(self, number):
+        name = self.ports.get(number)
+        if name is None:
+            name = self.ports[number] = str(number)
+        return name
+
+def decode_frame(data, offset, captured, linktype, timestamp, record_type, names):
+    if captured < 20:
+        return None
+    end = offset + captured
+    ip = _ip_offset(data, offset, linktype)
+    if ip < 0 or ip + 20 > end:
+        return None
+    version_ihl, total_length, protocol, raw_src, raw_dst = IPV4_HEADER.unpack_from(data, ip)
+    header_length = (version_ihl & 0x0f) * 4
+    src_host = names.address(raw_src)
+    dst_host = names.address(raw_dst)
+    transport = ip + header_length
+
+    src_port = dst_port = flags = seq = ack = win = None
+    length = total_length - header_length
+    if protocol == IPPROTO_TCP and transport + 20 <= end:
+        sport, dport, seq, ack, offset_flags, win = TCP_HEADER.unpack_from(data, transport)
+        src_port, dst_port = names.port(sport), names.port(dport)
+        flags = TCP_FLAGS[offset_flags & 0xff]
+        seq, win = str(seq), str(win)
+        ack = str(ack) if offset_flags & 0x10 else None
+        length -= (offset_flags >> 12) * 4
+    elif protocol == IPPROTO_UDP and transport + 8 <= end:
+        sport, dport, udp_length = UDP_HEADER.unpack_from(data, transport)
+        src_port, dst_port = names.port(sport), names.port(dport)
+        length = udp_length - 8
+
+    src = f"{src_host}.{src_port}" if src_port else src_host
+    dst = f"{dst_host}.{dst_port}" if dst_port else dst_host
+    return record_type((timestamp, src, src_host, src_port, dst, dst_host, dst_port,
+                        flags, seq, ack, win, str(length)))
+
+def _iter_pcap(data, record_type):
+    byte_order, resolution = PCAP_MAGIC[bytes(data[:4])]
+    linktype = struct.unpack_from(byte_order + 'I', data, 20)[0]
+    record_header = struct.Struct(byte_order + 'IIII')
+    divisor = resolution // 1_000_000
+    clock, names = _Clock(), _Names()
+    offset, size = 24, len(data)
+    while offset + 16 <= size:
+        seconds, fraction, captured, _ = record_header.unpack_from(data, offset)
+        offset += 16
+        record = decode_frame(data, offset, min(captured, size - offset), linktype,
+                              clock.format(seconds, fraction // divisor), record_type, names)
+        offset += captured
+        if record is not None:
+            yield record
+
+def _tsresol(options, byte_order):
+    # Option if_tsresol (code 9) du bloc de description d'interface
+    position = 0
+    while position + 4 <= len(options):
+        code, length = struct.unpack_from(byte_order + 'HH', options, position)
+        if code == 0:
+            break
+        if code == 9 and length >= 1:
+            value = options[position + 4]
+            return 2 ** (value & 0x7f) if value & 0x80 else 10 ** value
+        position += 4 + (length + 3) // 4 * 4
+    return 1_000_000
+
+def _iter_pcapng(data, record_type):
+    interfaces = []
+    byte_order = '<'
+    clock, names = _Clock(), _Names()
+    offset, size = 0, len(data)
+    while offset + 12 <= size:
+        block_type = struct.unpack_from(byte_order + 'I', data, offset)[0]
+        if block_type == 0x0A0D0D0A:
+            byte_order = '<' if data[offset + 8:offset + 12] == b'\x4d\x3c\x2b\x1a' else '>'
+            interfaces = []
+        block_length = struct.unpack_from(byte_order + 'I', data, offset + 4)[0]
+        if block_length < 12:
+            break
+        body = offset + 8
+
+        if block_type == 1:
+            linktype = struct.unpack_from(byte_order + 'H', data, body)[0]
+            interfaces.append((linktype, _tsresol(data[body + 8:offset + block_length - 4], byte_order)))
+        elif block_type == 6:
+            interface, high, low, captured, _ = struct.unpack_from(byte_order + 'IIIII', data, body)
+            linktype, resolution = interfaces[interface]
+            ticks = (high << 32) | low
+            seconds, fraction = divmod(ticks, resolution)
+            record = decode_frame(data, body + 20, captured, linktype,
+                                  clock.format(seconds, fraction * 1_000_000 // resolution),
+                                  record_type, names)
+            if record is not None:
+                yield record
+        elif block_type == 3 and interfaces:
+            original = struct.unpack_from(byte_order + 'I', data, body)[0]
+            captured = min(original, block_length - 16)
+            record = decode_frame(data, body + 4, captured, interfaces[0][0], clock.format(0, 0),
+                                  record_type, names)
+            if record is not None:
+                yield record
+
+        offset += block_length
+
+def iter_pcap_records(file_path, record_type=tuple):
+    # record_type recoit les champs dans l'ordre de Analyser_app.PacketRecord
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if data[:4] == PCAPNG_MAGIC:
+            yield from _iter_pcapng(data, record_type)
+        else:
+            yield from _iter_pcap(data, record_type)
@@ -0,0 +1,106 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+from collections import defaultdict
+
+from Prgramme4 import compter_seances_par_mois, graphique_mois
+from Programme5 import creer_markdown, generer_html
+from cache_calendrier import charger_seances
+from charts import CHART_CACHE_DIR, ChartCache, copy_if_changed
+from synchro_calendrier import contenu
+
+# A incrementer quand la mise en forme des rapports change
+VERSION_RAPPORTS = 3
+NOM_MANIFESTE = 'manifeste.json'
+
+def grouper_par_cours_et_groupe(evenements, cours_retenus=None, groupes_retenus=None):
+    # Une seule passe sur les seances ; chaque seance va dans toutes ses paires (cours, groupe)
+    paires = defaultdict(list)
+    for evenement in sorted(evenements, key=lambda evenement: evenement.debut):
+        if evenement.cours is None or (cours_retenus and not cours_retenus.search(evenement.cours)):
+            continue
+        for groupe in evenement.groupes:
+            if groupes_retenus and not groupes_retenus.search(groupe):
+                continue
+            paires[evenement.cours, groupe].append(evenement)
+    return paires
+
+def nom_rapport(cours, groupe):
+    return re.sub(r'[^\w.-]+', '_', f"{cours}_{groupe}")
+
+def empreinte_seances(seances):
+    empreinte = hashlib.sha256(str(VERSION_RAPPORTS).encode())
+    for seance in seances:
+        empreinte.update(repr(contenu(seance)).encode('utf-8'))
+    return empreinte.hexdigest()
+
+def rendre_rapports(dossier, taches, workers=None):
+    # Graphiques rendus en parallele (processus, backend Agg) et en cache par donnees,
+    # puis rapports HTML ecrits ici : ils ne coutent presque rien
+    cubes = [compter_seances_par_mois(seances) for cours, groupe, seances in taches]
+    graphiques = [graphique_mois(cube, f"Nombre de séances de TP {cours} par mois ({groupe})")
+                  for cube, (cours, groupe, _) in zip(cubes, taches)]
+    images = ChartCache(os.path.join(dossier, CHART_CACHE_DIR)).render(graphiques, workers)
+    noms = []
+    for (cours, groupe, seances), cube, chemin_image in zip(taches, cubes, images):
+        nom = nom_rapport(cours, groupe)
+        image = f"seances_{nom}.png"
+        copy_if_changed(chemin_image, os.path.join(dossier, image))
+        generer_html(creer_markdown(seances, cube, cours, image),
+                     os.path.join(dossier, f"rapport_{nom}.html"))
+        noms.append(nom)
+    return noms
+
+def lire_manifeste(dossier):
+    try:
+        with open(os.path.join(dossier, NOM_MANIFESTE), 'r', encoding='utf-8') as fichier:
+            return json.load(fichier)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def ecrire_manifeste(dossier, manifeste):
+    chemin = os.path.join(dossier, NOM_MANIFESTE)
+    with open(chemin + '.tmp', 'w', encoding='utf-8') as fichier:
+        json.dump(manifeste, fichier, indent=1, sort_keys=True)
+    os.replace(chemin + '.tmp', chemin)
+
+def sorties_presentes(dossier, nom):
+    return all(os.path.exists(os.path.join(dossier, fichier))
+               for fichier in (f"seances_{nom}.png", f"rapport_{nom}.html"))
+
+def generer_rapports(nom_fichier, dossier, workers=None, cours_retenus=None, groupes_retenus=None):
+    # Renvoie (rapports regeneres, rapports inchanges)
+    os.makedirs(dossier, exist_ok=True)
+    paires = grouper_par_cours_et_groupe(charger_seances(nom_fichier), cours_retenus, groupes_retenus)
+    manifeste = lire_manifeste(dossier)
+    nouveau_manifeste = {}
+    taches = []
+    for (cours, groupe), seances in sorted(paires.items()):
+        nom = nom_rapport(cours, groupe)
+        empreinte = nouveau_manifeste[nom] = empreinte_seances(seances)
+        if manifeste.get(nom) != empreinte or not sorties_presentes(dossier, nom):
+            taches.append((cours, groupe, seances))
+
+    regeneres = rendre_rapports(dossier, taches, workers)
+    ecrire_manifeste(dossier, nouveau_manifeste)
+    return regeneres, len(paires) - len(regeneres)
+
+def main():
+    parser = argparse.ArgumentParser(description="Rapports HTML et graphiques pour chaque cours et groupe")
+    parser.add_argument('fichier', nargs='?', default='ADE_RT1_Septembre2023_Decembre2023.ics')
+    parser.add_argument('--sorties', default='rapports', help="dossier des rapports generes")
+    parser.add_argument('--workers', type=int, help="nombre de processus de rendu des graphiques")
+    parser.add_argument('--cours', help="expression reguliere sur le code du cours (ex. '^R1')")
+    parser.add_argument('--groupes', default='TP', help="expression reguliere sur le groupe")
+    args = parser.parse_args()
+
+    regeneres, inchanges = generer_rapports(
+        args.fichier, args.sorties, args.workers,
+        re.compile(args.cours) if args.cours else None,
+        re.compile(args.groupes) if args.groupes else None)
+    print(f"{len(regeneres)} rapports generes, {inchanges} inchanges dans {args.sorties}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import heapq
+import math
+from collections import Counter
+from hashlib import blake2b
+
+def hash64(value):
+    # Hachage stable d'un processus a l'autre (contrairement a hash()), pour
+    # pouvoir fusionner les esquisses calculees par les workers
+    return int.from_bytes(blake2b(value.encode('utf-8', 'replace'), digest_size=8).digest(), 'big')
+
+class HyperLogLog:
+    """Distinct count estimate in 2**precision bytes, standard error 1.04/sqrt(m)."""
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(self.size)
+        self._shift = 64 - precision
+        self._mask = (1 << self._shift) - 1
+
+    def add(self, value):
+        hashed = hash64(value)
+        index = hashed >> self._shift
+        rank = self._shift - (hashed & self._mask).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        size = self.size
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            estimate = size * math.log(size / zeros)
+        return int(round(estimate))
+
+    def relative_error(self):
+        return 1.04 / math.sqrt(self.size)
+
+    def __len__(self):
+        return self.count()
+
+class ExactDistinct(set):
+    """Exact counterpart of HyperLogLog, with the same interface."""
+
+    def count(self):
+        return len(self)
+
+    def relative_error(self):
+        return 0.0
+
+    def merge(self, other):
+        self |= other
+        return self
+
+class SpaceSaving:
+    """Top-k heavy hitters with at most `capacity` counters.
+
+    Each reported count overestimates the true one by at most its `error`,
+    and any key more frequent than total/capacity is guaranteed to be kept.
+    The smallest counter is found through a lazily updated heap.
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+        self._heap = []
+
+    def add(self, key, count=1):
+        self.total += count
+        counts = self.counts
+        if key in counts:
+            counts[key] += count
+            return
+        if len(counts) < self.capacity:
+            counts[key] = count
+            self.errors[key] = 0
+            heapq.heappush(self._heap, (count, key))
+            return
+        floor, victim = self._pop_min()
+        del counts[victim]
+        del self.errors[victim]
+        counts[key] = floor + count
+        self.errors[key] = floor
+        heapq.heappush(self._heap, (floor + count, key))
+
+    def _pop_min(self):
+        heap, counts = self._heap, self.counts
+        if len(heap) > 4 * self.capacity:
+            heap[:] = [(count, key) for key, count in counts.items()]
+            heapq.heapify(heap)
+        while True:
+            count, key = heapq.heappop(heap)
+            current = counts.get(key)
+            if current == count:
+                return count, key
+            if current is not None:
+                heapq.heappush(heap, (current, key))
+
+    def merge(self, other):
+        # Fusion des resumes (Agarwal et al.) : une cle absente d'un cote compte
+        # au plus pour le plus petit compteur de ce cote
+        floor_self = min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+        floor_other = min(other.counts.values()) if len(other.counts) >= other.capacity else 0
+        merged, errors = {}, {}
+        for key in self.counts.keys() | other.counts.keys():
+            merged[key] = self.counts.get(key, floor_self) + other.counts.get(key, floor_other)
+            errors[key] = self.errors.get(key, floor_self) + other.errors.get(key, floor_other)
+        kept = sorted(merged, key=merged.get, reverse=True)[:self.capacity]
+        self.counts = {key: merged[key] for key in kept}
+        self.errors = {key: errors[key] for key in kept}
+        self._heap = [(count, key) for key, count in self.counts.items()]
+        heapq.heapify(self._heap)
+        self.total += other.total
+        return self
+
+    def top(self, limit=None):
+        ranked = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        return [(key, count, self.errors[key]) for key, count in ranked[:limit]]
+
+    def items(self):
+        return self.counts.items()
+
+    def max_error(self):
+        return self.total // self.capacity if len(self.counts) >= self.capacity else 0
+
+class ExactCounter(Counter):
+    """Exact counterpart of SpaceSaving, with the same interface."""
+
+    def add(self, key, count=1):
+        self[key] += count
+
+    def merge(self, other):
+        self.update(other)
+        return self
+
+    def top(self, limit=None):
+        return [(key, count, 0) for key, count in self.most_common(limit)]
+
+    def max_error(self):
+        return 0
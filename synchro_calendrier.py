@@ -0,0 +1,124 @@
+import argparse
+import csv
+import os
+import re
+import time
+from collections import Counter, namedtuple
+
+from Programme2 import formater_date, formater_heure
+from cache_calendrier import CacheCalendrier, chemin_cache_defaut
+from dates_calendrier import colonnes_dates, fuseau
+from index_calendrier import IndexCalendrier
+
+# modifies : couples (ancienne version, nouvelle version)
+Differences = namedtuple('Differences', ['ajoutes', 'supprimes', 'modifies'])
+
+def contenu(evenement):
+    return (evenement.debut, evenement.fin, evenement.modalite, evenement.intitule,
+            evenement.salles, evenement.profs, evenement.groupes)
+
+def comparer(anciens, nouveaux):
+    precedents = {evenement.uid: evenement for evenement in anciens}
+    ajoutes, modifies = [], []
+    for evenement in nouveaux:
+        ancien = precedents.pop(evenement.uid, None)
+        if ancien is None:
+            ajoutes.append(evenement)
+        # Meme SEQUENCE et meme LAST-MODIFIED : evenement inchange (RFC 5545).
+        # ADE reecrit LAST-MODIFIED a chaque export, d'ou la comparaison du contenu
+        elif ((ancien.sequence, ancien.modifie) != (evenement.sequence, evenement.modifie)
+              and contenu(ancien) != contenu(evenement)):
+            modifies.append((ancien, evenement))
+    return Differences(ajoutes, list(precedents.values()), modifies)
+
+def synchroniser(nom_fichier, chemin_cache=None):
+    """Seances de l'export et leurs differences avec la derniere synchronisation.
+
+    La reference est gardee a part dans le cache (seances_synchro) et n'avance
+    qu'ici : charger_seances peut rafraichir le cache entre deux synchronisations.
+    Sans reference, toutes les seances sont des ajouts.
+    """
+    chemin = os.path.abspath(nom_fichier)
+    with CacheCalendrier(chemin_cache or chemin_cache_defaut(chemin)) as cache:
+        nouveaux = cache.charger(chemin)
+        empreinte = cache.empreinte(chemin)
+        precedente = cache.empreinte_synchro(chemin)
+        if precedente == empreinte:
+            return nouveaux, Differences([], [], [])
+        anciens = cache.lire_synchro(chemin) if precedente is not None else []
+        cache.ecrire_synchro(chemin, empreinte, nouveaux)
+    return nouveaux, comparer(anciens, nouveaux)
+
+def groupes_touches(differences):
+    groupes = set()
+    for evenement in differences.ajoutes + differences.supprimes:
+        groupes.update(evenement.groupes)
+    for ancien, nouveau in differences.modifies:
+        groupes.update(ancien.groupes)
+        groupes.update(nouveau.groupes)
+    return groupes
+
+def nom_sortie(groupe):
+    return re.sub(r'[^\w.-]+', '_', groupe)
+
+def mois(secondes):
+    date = time.gmtime(fuseau().vers_local(secondes))
+    return f"{date.tm_year}-{date.tm_mon:02d}"
+
+def ecrire_sorties_groupe(dossier, groupe, seances):
+    base = os.path.join(dossier, nom_sortie(groupe))
+    if not seances:
+        for suffixe in ('_seances.csv', '_mois.csv'):
+            if os.path.exists(base + suffixe):
+                os.remove(base + suffixe)
+        return
+    with open(base + '_seances.csv', 'w', encoding='utf-8', newline='') as fichier:
+        ecrivain = csv.writer(fichier, delimiter=';')
+        ecrivain.writerow(['date', 'heure', 'duree', 'modalite', 'intitule', 'salles', 'profs'])
+        dates, heures, durees = colonnes_dates([seance.debut for seance in seances],
+                                               [seance.fin for seance in seances])
+        for seance, date, heure, duree in zip(seances, dates, heures, durees):
+            ecrivain.writerow([date, heure, duree, seance.modalite.libelle, seance.intitule,
+                               '|'.join(seance.salles), '|'.join(seance.profs)])
+    with open(base + '_mois.csv', 'w', encoding='utf-8', newline='') as fichier:
+        ecrivain = csv.writer(fichier, delimiter=';')
+        ecrivain.writerow(['mois', 'seances', 'minutes'])
+        seances_mois, minutes_mois = Counter(), Counter()
+        for seance in seances:
+            seances_mois[mois(seance.debut)] += 1
+            minutes_mois[mois(seance.debut)] += seance.duree
+        for cle in sorted(seances_mois):
+            ecrivain.writerow([cle, seances_mois[cle], minutes_mois[cle]])
+
+def mettre_a_jour_sorties(dossier, evenements, groupes):
+    # Seuls les groupes touches par les differences sont recalcules et reecrits
+    os.makedirs(dossier, exist_ok=True)
+    index = IndexCalendrier(evenements)
+    for groupe in sorted(groupes):
+        ecrire_sorties_groupe(dossier, groupe, index.rechercher(groupe=groupe))
+
+def afficher_differences(differences):
+    for signe, evenements in (('+', differences.ajoutes), ('-', differences.supprimes),
+                              ('~', [nouveau for _, nouveau in differences.modifies])):
+        for evenement in evenements:
+            print(f"{signe} {formater_date(evenement.debut)} {formater_heure(evenement.debut)} "
+                  f"{evenement.intitule} ({', '.join(evenement.groupes) or 'vide'})")
+    print(f"{len(differences.ajoutes)} ajoutes, {len(differences.supprimes)} supprimes, "
+          f"{len(differences.modifies)} modifies")
+
+def main():
+    parser = argparse.ArgumentParser(description="Resynchronisation incrementale d'un export ADE")
+    parser.add_argument('fichier', nargs='?', default='ADE_RT1_Septembre2023_Decembre2023.ics')
+    parser.add_argument('--cache', help="base SQLite des seances deja analysees")
+    parser.add_argument('--sorties', help="dossier des listes de seances et comptes mensuels par groupe")
+    args = parser.parse_args()
+
+    evenements, differences = synchroniser(args.fichier, args.cache)
+    afficher_differences(differences)
+    if args.sorties:
+        groupes = groupes_touches(differences)
+        mettre_a_jour_sorties(args.sorties, evenements, groupes)
+        print(f"{len(groupes)} groupes mis a jour dans {args.sorties}")
+
+if __name__ == "__main__":
+    main()
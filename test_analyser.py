@@ -0,0 +1,97 @@
+import os
+import random
+import tempfile
+import unittest
+
+from Analyser_app import DAY_US, BurstDetector, TrafficAggregator, analyze_tcpdump
+
+def ligne(time_us, source, destination, flags='P.'):
+    secondes, micro = divmod(time_us % DAY_US, 1_000_000)
+    horodatage = f"{secondes // 3600:02d}:{secondes // 60 % 60:02d}:{secondes % 60:02d}.{micro:06d}"
+    return f"{horodatage} IP {source} > {destination}: Flags [{flags}], seq 1, win 100, length 10\n"
+
+def capture(debut_us, duree_us, graine=1, sans_reponse=0.0):
+    # Trafic de fond et une rafale d'une seconde a mi-parcours ; une part des SYN reste sans reponse
+    aleatoire = random.Random(graine)
+    lignes, instant = [], debut_us
+    rafale = debut_us + duree_us // 2
+    while instant < debut_us + duree_us:
+        instant += aleatoire.randrange(10_000, 60_000)
+        # Un port client par connexion : un SYN repete serait pris pour une retransmission
+        client = f"10.0.0.{aleatoire.randrange(1, 4)}.{1024 + len(lignes) // 3}"
+        lignes.append(ligne(instant, client, '10.0.0.9.http', 'S'))
+        if aleatoire.random() < sans_reponse:
+            lignes.extend(ligne(instant, client, '10.0.0.8.ssh', 'S') for _ in range(2))
+            continue
+        lignes.append(ligne(instant, '10.0.0.9.http', client, 'S.'))
+        lignes.append(ligne(instant, client, '10.0.0.9.http', '.'))
+        if rafale <= instant < rafale + 1_000_000:
+            lignes.extend(ligne(instant + rang, '10.0.0.66.5', '10.0.0.9.http') for rang in range(5))
+    return lignes
+
+def par_blocs(lignes, coupures):
+    total = TrafficAggregator()
+    for debut, fin in zip([0] + coupures, coupures + [len(lignes)]):
+        bloc = TrafficAggregator()
+        bloc.add_lines(lignes[debut:fin])
+        total.merge(bloc)
+    return total.to_stats()
+
+class BurstMergeTest(unittest.TestCase):
+
+    def test_rafale_coupee_par_un_bloc(self):
+        lignes = capture(10 * 3600 * 1_000_000, 20_000_000)
+        seul = TrafficAggregator()
+        seul.add_lines(lignes)
+        attendu = seul.to_stats()
+        self.assertTrue(attendu['detected_anomalies'])
+        # Coupures au milieu de la rafale et juste apres son debut
+        milieu = len(lignes) // 2
+        for coupures in ([milieu], [milieu - 7, milieu + 11], [len(lignes) // 3, milieu, 2 * len(lignes) // 3]):
+            with self.subTest(coupures=coupures):
+                self.assertEqual(par_blocs(lignes, coupures), attendu)
+
+    def test_minuit(self):
+        lignes = capture(DAY_US - 10_000_000, 20_000_000)
+        seul = TrafficAggregator()
+        seul.add_lines(lignes)
+        self.assertEqual(par_blocs(lignes, [len(lignes) // 4, len(lignes) // 2]), seul.to_stats())
+
+    def test_detecteurs_aleatoires(self):
+        for graine in range(100):
+            aleatoire = random.Random(graine)
+            instant, paquets = aleatoire.randrange(DAY_US), []
+            for _ in range(aleatoire.randrange(5, 300)):
+                instant += aleatoire.choice([aleatoire.randrange(20_000), aleatoire.randrange(400_000)])
+                paquets.append((instant % DAY_US, aleatoire.choice('abc'), aleatoire.randrange(100)))
+            options = {'window': 0.5, 'burst_rate': 20, 'max_bursts': 1000}
+            seul = BurstDetector(**options)
+            for paquet in paquets:
+                seul.add(*paquet)
+            coupures = sorted(aleatoire.sample(range(1, len(paquets)), 3))
+            total = BurstDetector(**options)
+            for debut, fin in zip([0] + coupures, coupures + [len(paquets)]):
+                bloc = BurstDetector(**options)
+                for paquet in paquets[debut:fin]:
+                    bloc.add(*paquet)
+                total.merge(bloc)
+            self.assertEqual(total.snapshot(), seul.snapshot(), graine)
+            self.assertEqual(total.duration_us(), seul.duration_us(), graine)
+
+class ColumnarTest(unittest.TestCase):
+
+    def test_minuit(self):
+        # Les connexions semi-ouvertes expirent apres flow_ttl, de part et d'autre de minuit
+        lignes = capture(DAY_US - 40_000_000, 80_000_000, sans_reponse=0.2)
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as fichier:
+            fichier.writelines(lignes)
+        try:
+            options = {'flow_ttl': 5.0}
+            attendu = analyze_tcpdump(fichier.name, **options)
+            self.assertTrue(attendu['half_open']['by_source'][0]['half_open'])
+            self.assertEqual(analyze_tcpdump(fichier.name, columnar=True, **options), attendu)
+        finally:
+            os.remove(fichier.name)
+
+if __name__ == "__main__":
+    unittest.main()
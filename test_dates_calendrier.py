@@ -0,0 +1,74 @@
+import random
+import unittest
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from dates_calendrier import FUSEAU, colonnes_dates, formater_date, formater_heure, secondes_ics
+
+PARIS = ZoneInfo(FUSEAU)
+# Changements d'heure 2023-2024 : 01:00 UTC le dernier dimanche de mars et d'octobre
+TRANSITIONS = ('20231029T010000Z', '20240331T010000Z', '20241027T010000Z')
+
+def reference(valeur):
+    # Meme regle que datetime (fold=0) pour les heures locales sautees ou repetees
+    if len(valeur) == 8:
+        return int(datetime(int(valeur[:4]), int(valeur[4:6]), int(valeur[6:8]), tzinfo=PARIS).timestamp())
+    date = datetime.strptime(valeur[:15], '%Y%m%dT%H%M%S')
+    return int(date.replace(tzinfo=timezone.utc if valeur.endswith('Z') else PARIS).timestamp())
+
+def valeur_ics(date, zulu):
+    return date.strftime('%Y%m%dT%H%M%S') + ('Z' if zulu else '')
+
+def valeurs_autour_des_transitions():
+    valeurs = []
+    for transition in TRANSITIONS:
+        instant = datetime.strptime(transition, '%Y%m%dT%H%M%SZ')
+        for decalage in (-3601, -3600, -1, 0, 1, 1799, 3599, 3600, 7200):
+            date = instant + timedelta(seconds=decalage)
+            valeurs.append(valeur_ics(date, True))
+            # Heures locales : 02:xx n'existe pas en mars et existe deux fois en octobre
+            valeurs.append(valeur_ics(date + timedelta(hours=1), False))
+            valeurs.append(valeur_ics(date + timedelta(hours=2), False))
+    return valeurs
+
+class SecondesIcsTest(unittest.TestCase):
+
+    def test_transitions(self):
+        for valeur in valeurs_autour_des_transitions():
+            with self.subTest(valeur=valeur):
+                self.assertEqual(secondes_ics(valeur), reference(valeur))
+
+    def test_heure_sautee_et_repetee(self):
+        # 02:30 le 31 mars garde le decalage d'hiver ; le 27 octobre, premier passage (ete)
+        self.assertEqual(secondes_ics('20240331T023000'), reference('20240331T013000Z'))
+        self.assertEqual(secondes_ics('20241027T023000'), reference('20241027T003000Z'))
+
+    def test_valeurs_aleatoires(self):
+        aleatoire = random.Random(1)
+        valeurs = []
+        for _ in range(5000):
+            date = datetime(1990, 1, 1) + timedelta(seconds=aleatoire.randrange(1_500_000_000))
+            forme = aleatoire.randrange(3)
+            valeurs.append(date.strftime('%Y%m%d') if forme == 2 else valeur_ics(date, forme == 0))
+        for valeur in valeurs:
+            self.assertEqual(secondes_ics(valeur), reference(valeur), valeur)
+
+class FormatageTest(unittest.TestCase):
+
+    def test_heures_locales(self):
+        instants = [reference(valeur) for valeur in valeurs_autour_des_transitions()]
+        attendus = [datetime.fromtimestamp(instant, PARIS) for instant in instants]
+        self.assertEqual([formater_date(instant) for instant in instants],
+                         [date.strftime('%d-%m-%Y') for date in attendus])
+        self.assertEqual([formater_heure(instant) for instant in instants],
+                         [date.strftime('%H:%M') for date in attendus])
+
+    def test_colonnes_dates(self):
+        instants = [reference(valeur) for valeur in valeurs_autour_des_transitions()]
+        dates, heures, durees = colonnes_dates(instants, [instant + 5400 for instant in instants])
+        self.assertEqual(list(zip(dates, heures)), [(formater_date(instant), formater_heure(instant))
+                                                   for instant in instants])
+        self.assertEqual(set(durees), {'01:30'})
+
+if __name__ == "__main__":
+    unittest.main()